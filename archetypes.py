@@ -0,0 +1,351 @@
+"""
+Household archetypes for fast repeated scenario, tariff and policy runs.
+
+    python archetypes.py --households 500000 --k 2000
+
+A synthetic population gives every household a whole number of units of
+each device (ownership as in profiles.py) and its own daily active minutes
+per unit.  Those minutes are T_active scaled by a household usage intensity
+shared across its devices and by per-device lognormal noise.  A population
+is a dict of `units` and `minutes` (active unit-minutes per day), both
+(households, devices), plus a national `weight` per household.
+
+build() clusters households with k-means on their active and stand-by kWh
+per device, so distance is measured in energy.  The centroids are fitted on
+a sample, every household is then assigned, and each archetype keeps the
+exact mean units and minutes of its members with the summed weight.  The
+archetypes are a population of their own.  Anything linear in units and
+minutes (national GWh under Pmid, P_standby, T_active or Units_mil
+overrides, bills under any tariff) is reproduced exactly.  Nonlinear
+policies such as per-household usage caps are approximated, and compare()
+reports their error against the full run.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+import model
+import profiles
+import tariffs
+from model import CARBON, PARAMS
+from montecarlo import weighted_percentile
+
+K = 2000                       # archetypes
+SAMPLE = 50_000                # households the centroids are fitted on
+CHUNK = 100_000                # households per assignment block
+TOL = 0.01                     # stated tolerance on national results (1 %)
+
+
+# ======== POPULATION ================================================
+def population(df, households=500_000, households_mil=profiles.HOUSEHOLDS_MIL,
+               sigma=0.5, shared=0.5, seed=42):
+    """
+    Synthetic households: units owned and active unit-minutes per device.
+
+    sigma  : lognormal spread of each household's minutes around T_active
+    shared : fraction of that variance common to all of a household's devices
+    Always-on devices (T_active = 1440) stay at 1440.
+    """
+    rng = np.random.default_rng(seed)
+    own = profiles.ownership(df, households_mil)
+    whole = np.floor(own)
+    units = whole + (rng.random((households, len(df))) < own - whole)
+
+    s_h, s_d = sigma * np.sqrt(shared), sigma * np.sqrt(1 - shared)
+    mult = (rng.lognormal(-s_h**2 / 2, s_h, (households, 1))
+            * rng.lognormal(-s_d**2 / 2, s_d, (households, len(df))))
+    T = df["T_active"].to_numpy(float)
+    T_hh = np.where(T >= 1440, 1440, np.minimum(T * mult, 1440))
+    return {"units": units.astype(np.float32),
+            "minutes": (units * T_hh).astype(np.float32),
+            "weight": np.full(households, households_mil * 1e6 / households)}
+
+
+def household_kwh(pop, df, overrides=None, policy=None, days=365):
+    """
+    kWh per household per device, (households, devices).
+
+    overrides : {device: {param: value}} as model.apply_overrides; T_active
+                and Units_mil scale each household's minutes and units
+    policy    : {"usage_cap": {device: min/day per unit},
+                 "standby_cap": {device: W}}
+    An archetype's usage cap removes the expected excess of its members,
+    E[max(u - a·cap, 0)], from their mean and covariance (normal
+    approximation); a household's is exact.
+    """
+    P, T, Ps, U = (df[p].to_numpy(float, copy=True) for p in PARAMS)
+    T0, U0 = T.copy(), U.copy()
+    overrides = overrides or {}
+    for j, values in zip(_index(df, overrides), overrides.values()):
+        for p, v in values.items():
+            if p not in PARAMS:
+                raise KeyError(f"unknown parameter: {p!r}")
+            (P, T, Ps, U)[PARAMS.index(p)][j] = v
+    t_ratio = np.divide(T, T0, out=np.ones_like(T), where=T0 > 0)
+    u_ratio = np.divide(U, U0, out=np.ones_like(U), where=U0 > 0)
+    a = pop["units"] * u_ratio
+    u = np.minimum(pop["minutes"] * (u_ratio * t_ratio), 1440 * a)
+
+    policy = policy or {}
+    caps = policy.get("usage_cap", {})
+    for j, cap in zip(_index(df, caps), caps.values()):
+        m = u[:, j] - cap * a[:, j]
+        if "cov" not in pop:
+            u[:, j] -= np.maximum(m, 0)
+            continue
+        r = u_ratio[j] * np.array([t_ratio[j], -cap])    # v = r · (u, a)
+        var = np.einsum("i,nij,j->n", r, pop["cov"][:, j], r)
+        sd = np.sqrt(np.maximum(var, 0))
+        z = np.divide(m, sd, out=np.where(m > 0, np.inf, -np.inf), where=sd > 0)
+        pdf = np.exp(-z**2 / 2) / np.sqrt(2 * np.pi)
+        excess = np.where(sd > 0, m * ndtr(z) + sd * pdf, np.maximum(m, 0))
+        u[:, j] -= excess
+    caps = policy.get("standby_cap", {})
+    j = _index(df, caps)
+    Ps[j] = np.minimum(Ps[j], list(caps.values()))
+    return np.add(*_energy(P, Ps, u, a, days))
+
+
+def _energy(P, Ps, u, a, days=365, chunk=CHUNK):
+    """
+    Active and stand-by kWh for `u` active unit-minutes over `a` units:
+    model.energy per unit with T = u / a, times the `a` units.
+    """
+    active, standby = np.empty(np.shape(u)), np.empty(np.shape(u))
+    for s in range(0, len(u), chunk):
+        uu, aa = u[s:s + chunk], a[s:s + chunk]
+        T = np.divide(uu, aa, out=np.zeros(np.shape(uu)), where=aa > 0)
+        act, sb = model.energy(P, T, Ps, days=days)
+        np.multiply(act, aa, out=active[s:s + chunk])
+        np.multiply(sb, aa, out=standby[s:s + chunk])
+    return active, standby
+
+
+def _index(df, devices):
+    """Row of each named device."""
+    if not devices:
+        return []
+    rows = {d: j for j, d in enumerate(df["Device"])}
+    missing = [d for d in devices if d not in rows]
+    if missing:
+        raise KeyError(f"unknown device: {missing[0]!r}")
+    return [rows[d] for d in devices]
+
+
+# ======== EVALUATIONS ===============================================
+def national(pop, kwh):
+    """National GWh per device."""
+    return pop["weight"] @ kwh / 1e6
+
+
+def bills(pop, kwh, R, share):
+    """
+    £/household/yr for every tariff (households, tariffs): each device's kWh
+    priced by its half-hourly share as in tariffs.bills.
+    """
+    return kwh @ (R @ share.T).T
+
+
+def evaluate(pop, df, overrides=None, policy=None, tariff=None, q=None):
+    """
+    National GWh and kt, plus national £m per tariff when `tariff` =
+    (names, R, share) is given.  `q` adds household bill percentiles; on
+    archetypes these miss the spread inside each archetype.
+    """
+    kwh = household_kwh(pop, df, overrides, policy)
+    gwh = national(pop, kwh).sum()
+    out = {"GWh_nat": gwh, "kt_nat": gwh * CARBON}
+    if tariff is not None:
+        names, R, share = tariff
+        B = bills(pop, kwh, R, share)
+        for i, n in enumerate(names):
+            out[f"£m {n}"] = pop["weight"] @ B[:, i] / 1e6
+            if q:
+                for p, v in zip(q, weighted_percentile(B[:, i], q, pop["weight"])):
+                    out[f"£_hh P{p} {n}"] = v
+    return out
+
+
+# ======== ARCHETYPES ================================================
+def features(pop, df):
+    """Active and stand-by kWh per device, (households, 2·devices), float32."""
+    return np.hstack(_energy(df["Pmid"].to_numpy(float),
+                             df["P_standby"].to_numpy(float),
+                             pop["minutes"], pop["units"])).astype(np.float32)
+
+
+def _nearest(X, C, C2=None, block=10_000):
+    """Index of and squared distance to the nearest centroid, per row."""
+    C2 = (C * C).sum(1) if C2 is None else C2
+    j = np.empty(len(X), np.int64)
+    d2 = np.empty(len(X), X.dtype)
+    for s in range(0, len(X), block):
+        x = X[s:s + block]
+        d = C2 - 2 * x @ C.T
+        j[s:s + block] = d.argmin(1)
+        d2[s:s + block] = d[np.arange(len(x)), j[s:s + block]] + (x * x).sum(1)
+    return j, np.maximum(d2, 0)
+
+
+def kmeans(X, k, iters=10, seed=0, rounds=20):
+    """
+    Lloyd's k-means; returns centroids (k, dim).  Seeding is D²-sampling
+    as k-means++ but k / rounds centroids per round, so it costs `rounds`
+    distance passes rather than k.
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(X))
+    C = X[rng.integers(len(X))][None]
+    d2 = ((X - C[0])**2).sum(1)
+    while len(C) < k:
+        b = min(-(-k // rounds), k - len(C))
+        p = d2 / d2.sum() if d2.sum() > 0 else None
+        new = X[rng.choice(len(X), b, replace=False, p=p)]
+        d2 = np.minimum(d2, _nearest(X, new)[1])
+        C = np.vstack([C, new])
+    for _ in range(iters):
+        j, _ = _nearest(X, C)
+        counts = np.bincount(j, minlength=k)
+        sums = np.stack([np.bincount(j, X[:, c], minlength=k)
+                         for c in range(X.shape[1])], axis=1)
+        moved = counts > 0
+        new = (sums[moved] / counts[moved, None]).astype(X.dtype)
+        if np.allclose(new, C[moved]):
+            break
+        C[moved] = new
+    return C
+
+
+def build(pop, df, k=K, sample=SAMPLE, iters=10, seed=0, chunk=CHUNK):
+    """
+    Weighted archetypes of `pop` and their reconstruction error.
+
+    Returns (archetypes, report).  `archetypes` is a population with the
+    members' (minutes, units) covariance per device `cov` (k, devices, 2, 2),
+    `members` and `labels`.  `report` has R² and RMSE of the kWh features,
+    the mean relative error of each household's annual kWh and the
+    baseline national GWh of both.
+    """
+    rng = np.random.default_rng(seed)
+    X = features(pop, df)
+    n = len(X)
+    fit = X if n <= sample else X[rng.choice(n, sample, replace=False)]
+    C = kmeans(fit, k, iters, seed)
+    C2 = (C * C).sum(1)
+
+    labels = np.concatenate([_nearest(X[s:s + chunk], C, C2)[0]
+                             for s in range(0, n, chunk)])
+
+    # exact weighted member means; drop archetypes nobody joined
+    w = pop["weight"]
+    W = np.bincount(labels, w, minlength=len(C))
+    keep = np.flatnonzero(W > 0)
+    remap = np.full(len(C), -1)
+    remap[keep] = np.arange(len(keep))
+    labels = remap[labels]
+
+    def wmean(x):
+        return np.stack([np.bincount(labels, w * x[:, j], minlength=len(keep))
+                         for j in range(len(df))], axis=1) / W[keep, None]
+
+    u, a = pop["minutes"].astype(float), pop["units"].astype(float)
+    mu, ma = wmean(u), wmean(a)
+    cuu, cua, caa = wmean(u * u) - mu**2, wmean(u * a) - mu * ma, wmean(a * a) - ma**2
+    arch = {"units": ma, "minutes": mu,
+            "cov": np.stack([np.stack([cuu, cua], -1), np.stack([cua, caa], -1)], -2),
+            "weight": W[keep], "members": np.bincount(labels), "labels": labels}
+
+    # reconstruction error against the exact centroids
+    Xa = features(arch, df)
+    sse = sum(float(((X[s:s + chunk] - Xa[labels[s:s + chunk]])**2).sum())
+              for s in range(0, n, chunk))
+    sst = float(((X - X.mean(0))**2).sum())
+    tot, tot_a = X.sum(1), Xa[labels].sum(1)
+    report = {
+        "households": n, "archetypes": len(keep),
+        "R2": 1 - sse / sst,
+        "RMSE_kWh": float(np.sqrt(sse / n)),
+        "mean_rel_err_kWh": float(np.mean(np.abs(tot_a - tot) / np.maximum(tot, 1e-9))),
+        "GWh_full": float(w @ tot / 1e6),
+        "GWh_archetypes": float(arch["weight"] @ Xa.sum(1) / 1e6),
+    }
+    return arch, report
+
+
+def compare(pop, arch, df, runs, tariff=None, tol=TOL):
+    """
+    Run each {name: (overrides, policy)} on the full population and on the
+    archetypes.  One row per run and output, with both values, the relative
+    error, whether it is within `tol`, and both run times.
+    """
+    rows = []
+    for name, (overrides, policy) in runs.items():
+        t0 = time.perf_counter()
+        full = evaluate(pop, df, overrides, policy, tariff)
+        t1 = time.perf_counter()
+        fast = evaluate(arch, df, overrides, policy, tariff)
+        t2 = time.perf_counter()
+        for out in full:
+            err = fast[out] / full[out] - 1 if full[out] else 0.0
+            rows.append({"Run": name, "Output": out, "Full": full[out],
+                         "Archetypes": fast[out], "Rel_err": err,
+                         "Within": abs(err) <= tol,
+                         "t_full_ms": 1e3 * (t1 - t0), "t_arch_ms": 1e3 * (t2 - t1)})
+    return pd.DataFrame(rows)
+
+
+def default_runs(df):
+    """Baseline, an efficiency scenario and two policies."""
+    top = df.sort_values("GWh_nat", ascending=False)["Device"].iloc[:5]
+    timed = df.loc[df["T_active"] < 1440].sort_values("GWh_nat", ascending=False)
+    return {
+        "Baseline": (None, None),
+        "Top-5 devices 20 % more efficient":
+            ({d: {"Pmid": df.loc[df["Device"] == d, "Pmid"].iloc[0] * 0.8}
+              for d in top}, None),
+        "Usage cap at T_active":
+            (None, {"usage_cap": {d: t for d, t in
+                                  zip(timed["Device"].iloc[:5], timed["T_active"].iloc[:5])}}),
+        "Standby cap 0.5 W":
+            (None, {"standby_cap": dict.fromkeys(df["Device"], 0.5)}),
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--households", type=int, default=500_000)
+    ap.add_argument("--k", type=int, default=K)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--tariffs", help="JSON or CSV tariff file (tariffs.py)")
+    a = ap.parse_args()
+
+    df = model.compute(model.load_registry())
+    t0 = time.perf_counter()
+    pop = population(df, a.households, seed=a.seed)
+    arch, rep = build(pop, df, a.k, seed=a.seed)
+    print(f"{rep['households']:,} households → {rep['archetypes']:,} archetypes "
+          f"in {time.perf_counter() - t0:.1f} s")
+    print(f"Reconstruction: R² {rep['R2']:.4f}, RMSE {rep['RMSE_kWh']:,.1f} kWh, "
+          f"mean household error {100 * rep['mean_rel_err_kWh']:.1f}%, "
+          f"national {rep['GWh_full']:,.0f} vs {rep['GWh_archetypes']:,.0f} GWh")
+
+    if a.tariffs:
+        names, R, _ = tariffs.load_tariffs(a.tariffs)
+    else:
+        names, R, _ = tariffs.from_dict({
+            "Flat": {"type": "flat", "rate": 0.245},
+            "E7": {"type": "economy7", "day": 0.29, "night": 0.13}})
+    cmp = compare(pop, arch, df, default_runs(df),
+                  (names, R, tariffs.shares(df)))
+    print(f"\nFull population vs archetypes (tolerance ±{100 * TOL:.0f}%)")
+    print(cmp.drop(columns=["t_full_ms", "t_arch_ms"]).to_string(
+        index=False, formatters={"Full": "{:,.1f}".format,
+                                 "Archetypes": "{:,.1f}".format,
+                                 "Rel_err": "{:+.3%}".format}))
+    t = cmp.groupby("Run", sort=False)[["t_full_ms", "t_arch_ms"]].first()
+    print(f"\nPer run: full {t.t_full_ms.mean():,.1f} ms, archetypes "
+          f"{t.t_arch_ms.mean():,.2f} ms "
+          f"({t.t_full_ms.sum() / t.t_arch_ms.sum():,.0f}× faster)")
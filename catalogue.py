@@ -0,0 +1,213 @@
+"""
+Indexed catalogue of model runs in an embedded SQLite file.
+
+    python catalogue.py runs.db "Kettle.Pmid > 2800" "GWh < 55000"
+
+Every run stores:
+
+* the hash of its input registry;
+* its parameters (seed, N, scenario name, … as JSON);
+* headline GWh / kt and the category splits;
+* an optional path to the full result file.
+
+Each distinct registry's inputs are stored once, one row per device and
+parameter, and every queried column is indexed.  Conditions such as
+"Kettle.Pmid > 2800" or "Kitchen.GWh < 40000" therefore become indexed
+joins.  log() buffers runs and writes them BATCH at a time in one
+transaction, so large sweeps are not slowed by logging.  Inputs and
+category rows go in with executemany.  Runs are inserted one statement
+each so SQLite assigns their ids, and several writers can share a file.
+The ids are kept in Catalogue.run_ids in log order.
+"""
+import argparse
+import json
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+from model import CARBON, PARAMS, input_hash
+
+BATCH = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    created     REAL,
+    input_hash  TEXT,
+    name        TEXT,
+    seed        INTEGER,
+    N           INTEGER,
+    params      TEXT,
+    GWh         REAL,
+    kt          REAL,
+    result_path TEXT
+);
+CREATE TABLE IF NOT EXISTS inputs (
+    input_hash TEXT, device TEXT, param TEXT, value REAL,
+    PRIMARY KEY (input_hash, device, param)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS categories (
+    run_id INTEGER, category TEXT, GWh REAL, kt REAL
+);
+CREATE INDEX IF NOT EXISTS runs_hash   ON runs (input_hash);
+CREATE INDEX IF NOT EXISTS runs_GWh    ON runs (GWh);
+CREATE INDEX IF NOT EXISTS runs_kt     ON runs (kt);
+CREATE INDEX IF NOT EXISTS runs_name   ON runs (name);
+CREATE INDEX IF NOT EXISTS inputs_val  ON inputs (device, param, value, input_hash);
+CREATE INDEX IF NOT EXISTS cats_GWh    ON categories (category, GWh, run_id);
+CREATE INDEX IF NOT EXISTS cats_kt     ON categories (category, kt, run_id);
+CREATE INDEX IF NOT EXISTS cats_run    ON categories (run_id);
+"""
+
+
+def _condition(text):
+    """'Kettle.Pmid > 2800' → (kind, name, field, op, value)."""
+    m = re.fullmatch(r"\s*(.+?)\s*(<=|>=|!=|=|<|>)\s*([-+\d.eE]+)\s*", text)
+    if not m:
+        raise ValueError(f"cannot parse condition: {text!r}")
+    lhs, op, value = m.group(1), m.group(2), float(m.group(3))
+    name, _, field = lhs.rpartition(".")
+    if not name and field in ("GWh", "kt"):
+        return "total", None, field, op, value
+    if field in PARAMS:
+        return "input", name, field, op, value
+    if field in ("GWh", "kt"):
+        return "category", name, field, op, value
+    raise ValueError(f"unknown field in condition: {text!r}")
+
+
+class Catalogue:
+    """A run catalogue on one SQLite file (":memory:" for a scratch one)."""
+
+    def __init__(self, path="runs.db", batch=BATCH):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.batch = batch
+        self._runs, self._cats, self._inputs = [], [], []
+        self.run_ids = []                       # ids of flushed runs, log order
+        self._hashes = {h for (h,) in self.db.execute(
+            "SELECT DISTINCT input_hash FROM inputs")}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── writing ───────────────────────────────────────────────────────
+    def log(self, df, name=None, seed=None, N=None, params=None,
+            result_path=None, carbon=CARBON):
+        """
+        Queue one run; df is the computed device table (GWh_nat per device).
+        Writes happen every `batch` runs and on flush().  Returns the run's
+        position: once written, its id is run_ids[position].
+        """
+        h = input_hash(df)
+        if h not in self._hashes:
+            self._hashes.add(h)
+            self._inputs += [(h, d, p, float(v))
+                             for d, *vals in df[["Device"] + PARAMS]
+                             .itertuples(index=False)
+                             for p, v in zip(PARAMS, vals)]
+        run = len(self._runs)                   # position in this batch
+        gwh = float(df["GWh_nat"].sum())
+        self._runs.append((time.time(), h, name, seed, N,
+                           json.dumps(params or {}, sort_keys=True),
+                           gwh, gwh * carbon, result_path))
+        if "Category" in df:
+            cats = {}
+            for c, v in zip(df["Category"], df["GWh_nat"].to_numpy(float)):
+                cats[c] = cats.get(c, 0.0) + v
+            self._cats += [(run, c, v, v * carbon) for c, v in cats.items()]
+        if len(self._runs) >= self.batch:
+            self.flush()
+        return len(self.run_ids) + len(self._runs) - 1
+
+    def flush(self):
+        """Write queued runs in one transaction; returns their new run ids."""
+        if not (self._runs or self._inputs):
+            return []
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO inputs VALUES (?, ?, ?, ?)", self._inputs)
+            ids = [self.db.execute(
+                "INSERT INTO runs VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?)", r
+            ).lastrowid for r in self._runs]
+            self.db.executemany(
+                "INSERT INTO categories VALUES (?, ?, ?, ?)",
+                [(ids[run], *rest) for run, *rest in self._cats])
+        self._runs, self._cats, self._inputs = [], [], []
+        self.run_ids += ids
+        return ids
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    # ── queries ───────────────────────────────────────────────────────
+    def find(self, *conditions, limit=None):
+        """
+        Runs matching every condition, newest first:
+
+            "GWh < 55000"            headline total (GWh or kt)
+            "Kettle.Pmid > 2800"     registry input of a device
+            "Kitchen.GWh < 40000"    category total
+        """
+        self.flush()
+        sql = ["SELECT r.* FROM runs r"]
+        where, join_args, where_args = [], [], []
+        for i, text in enumerate(conditions):
+            kind, name, field, op, value = _condition(text)
+            if kind == "total":
+                where.append(f"r.{field} {op} ?")
+                where_args.append(value)
+            elif kind == "input":
+                sql.append(f"JOIN inputs i{i} ON i{i}.input_hash = r.input_hash "
+                           f"AND i{i}.device = ? AND i{i}.param = ? "
+                           f"AND i{i}.value {op} ?")
+                join_args += [name, field, value]
+            else:
+                sql.append(f"JOIN categories c{i} ON c{i}.run_id = r.id "
+                           f"AND c{i}.category = ? AND c{i}.{field} {op} ?")
+                join_args += [name, value]
+        query = " ".join(sql) + (" WHERE " + " AND ".join(where) if where else "")
+        query += " ORDER BY r.id DESC" + (f" LIMIT {int(limit)}" if limit else "")
+        return pd.read_sql_query(query, self.db, params=join_args + where_args)
+
+    def categories(self, run_ids):
+        """Category splits of the given runs, (runs × categories) GWh."""
+        self.flush()
+        marks = ",".join("?" * len(run_ids))
+        c = pd.read_sql_query(
+            f"SELECT * FROM categories WHERE run_id IN ({marks})",
+            self.db, params=list(map(int, run_ids)))
+        return c.pivot(index="run_id", columns="category", values="GWh")
+
+    def inputs(self, run_id):
+        """The registry inputs of one run, devices × parameters."""
+        self.flush()
+        i = pd.read_sql_query(
+            "SELECT device, param, value FROM inputs "
+            "WHERE input_hash = (SELECT input_hash FROM runs WHERE id = ?)",
+            self.db, params=[int(run_id)])
+        return i.pivot(index="device", columns="param", values="value")[PARAMS]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("db")
+    ap.add_argument("conditions", nargs="*",
+                    help='e.g. "Kettle.Pmid > 2800" "GWh < 55000"')
+    ap.add_argument("--limit", type=int, default=20)
+    a = ap.parse_args()
+
+    with Catalogue(a.db) as cat:
+        t = time.perf_counter()
+        runs = cat.find(*a.conditions, limit=a.limit)
+        ms = (time.perf_counter() - t) * 1e3
+        print(f"{len(runs)} runs ({ms:.1f} ms)")
+        print(runs.drop(columns=["params"]).to_string(
+            index=False, formatters={"GWh": "{:,.1f}".format,
+                                     "kt": "{:,.1f}".format}))
@@ -0,0 +1,199 @@
+"""
+Checkpoint and resume for long simulations.
+
+    python checkpoint.py --N 1000000000 --path mc.ckpt     # rerun to resume
+
+A Checkpoint holds the latest snapshot of a job's state on local disk:
+
+* JSON metadata (config, completed batch index, RNG bit-generator state);
+* numpy arrays (accumulators, histogram sketch).
+
+save() copies the arrays and hands them to a background thread.  That
+thread writes to a temporary file and renames it over the old one, so the
+compute loop never waits on disk and a crash mid-write leaves the previous
+snapshot intact.  If the compute outruns the disk, only the newest
+pending snapshot is written.
+
+monte_carlo() is the streaming national Monte Carlo built on it.  One
+Generator advances batch by batch and its state is checkpointed every
+`every` batches, so a resumed run replays exactly the draws the
+interrupted one would have made.  Same seed, same result.
+"""
+import argparse
+import json
+import os
+import threading
+import warnings
+
+import numpy as np
+
+import model
+from model import input_hash
+from montecarlo import BINS, CHUNK, hist_summary, mc_bounds, national, sample_kwh
+
+
+class Checkpoint:
+    """Latest-state snapshots of one job, written asynchronously."""
+
+    def __init__(self, path):
+        self.path = path
+        self._pending = None
+        self._closing = False
+        self._cv = threading.Condition()
+        self._thread = None
+        self.error = None
+        self.writes = 0
+
+    def load(self):
+        """
+        (meta, arrays) of the last snapshot, or None.  An unreadable or
+        foreign file counts as no snapshot, with a warning.
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as z:
+                meta = json.loads(str(z["_meta"]))
+                if not isinstance(meta, dict):
+                    raise ValueError("metadata is not a JSON object")
+                return meta, {k: z[k] for k in z.files if k != "_meta"}
+        except Exception as e:
+            warnings.warn(f"ignoring unreadable checkpoint {self.path!r} "
+                          f"({type(e).__name__}: {e})", stacklevel=2)
+            return None
+
+    def save(self, meta, arrays):
+        """Queue a snapshot; returns at once."""
+        snap = (json.dumps(meta), {k: np.array(v, copy=True)
+                                   for k, v in arrays.items()})
+        with self._cv:
+            if self.error:
+                raise self.error
+            self._pending = snap
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer, daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def _writer(self):
+        while True:
+            with self._cv:
+                while self._pending is None and not self._closing:
+                    self._cv.wait()
+                if self._pending is None:
+                    return
+                meta, arrays = self._pending
+                self._pending = None
+            try:
+                tmp = self.path + ".tmp"
+                with open(tmp, "wb") as f:
+                    np.savez(f, _meta=np.array(meta), **arrays)
+                os.replace(tmp, self.path)
+                self.writes += 1
+            except Exception as e:          # surfaces on the next save()/close()
+                with self._cv:
+                    self.error = e
+
+    def close(self):
+        """Write anything pending and stop the writer."""
+        with self._cv:
+            self._closing = True
+            self._cv.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._closing = False
+        if self.error:
+            raise self.error
+
+
+def monte_carlo(df, N=1_000_000, seed=42, band=0.1, batch=CHUNK, path=None,
+                every=16, q=(5, 50, 95), progress=None):
+    """
+    National Monte Carlo in batches, resumable from `path`.
+
+    Returns mean, sd, min/max and percentiles (from a BINS histogram
+    between the lowest and highest possible totals), plus the mean kWh per
+    device.  A checkpoint from a different config (registry, N, seed, band,
+    batch) is ignored.
+    """
+    units = df["Units_mil"].to_numpy(float)
+    rng_range = mc_bounds(df, band)
+    config = {"registry": input_hash(df), "N": N, "seed": seed, "band": band,
+              "batch": batch}
+    n_batches = -(-N // batch)
+
+    ck = Checkpoint(path) if path else None
+    snap = ck.load() if ck else None
+    rng = np.random.default_rng(seed)
+    if snap and snap[0].get("config") == config:
+        meta, acc = snap
+        rng.bit_generator.state = meta["rng"]
+        start = meta["batch"]
+    else:
+        start = 0
+        acc = {"moments": np.zeros(3), "extremes": np.array([np.inf, -np.inf]),
+               "hist": np.zeros(BINS, np.int64), "kwh": np.zeros(len(df))}
+
+    def snapshot(i):
+        ck.save({"config": config, "batch": i, "rng": rng.bit_generator.state},
+                acc)
+
+    if progress is not None and start:
+        progress.update(min(start * batch, N))
+    try:
+        for i in range(start, n_batches):
+            n = min(batch, N - i * batch)
+            mc = sample_kwh(df, n, rng, band)
+            total = national(mc, units)
+            acc["moments"] += (n, total.sum(), total @ total)
+            acc["extremes"] = np.array([min(acc["extremes"][0], total.min()),
+                                        max(acc["extremes"][1], total.max())])
+            acc["hist"] += np.histogram(total, BINS, range=rng_range)[0]
+            acc["kwh"] += mc.sum(1)
+            if ck and ((i + 1) % every == 0 or i + 1 == n_batches):
+                snapshot(i + 1)
+            if progress is not None:
+                progress.update(n, totals=total)
+    except BaseException:
+        if ck:                          # report the loop's error, not close()'s
+            try:
+                ck.close()
+            except Exception as e:
+                warnings.warn(f"checkpoint {path!r} not closed cleanly: {e!r}")
+        raise
+    if ck:
+        ck.close()
+
+    n, s, ss = acc["moments"]
+    part = {"n": int(n), "sum": s, "sumsq": ss, "min": acc["extremes"][0],
+            "max": acc["extremes"][1], "hist": acc["hist"]}
+    out = hist_summary([part], rng_range, q)
+    out["kWh_hh_mean"] = dict(zip(df["Device"], acc["kwh"] / n))
+    out["resumed_from"] = start
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--N", type=int, default=10_000_000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--band", type=float, default=0.1)
+    ap.add_argument("--path", default="mc.ckpt")
+    ap.add_argument("--every", type=int, default=16)
+    ap.add_argument("--progress", choices=["terminal", "jsonl"])
+    a = ap.parse_args()
+
+    df = model.compute(model.load_registry())
+    bar = None
+    if a.progress:
+        from progress import Progress
+        bar = Progress(a.N, "samples", a.progress)
+    r = monte_carlo(df, a.N, a.seed, a.band, path=a.path, every=a.every,
+                    progress=bar)
+    if bar:
+        bar.close()
+    if r["resumed_from"]:
+        print(f"resumed after batch {r['resumed_from']}")
+    print(f"{r['N']:,} draws: mean {r['mean']:,.1f} GWh, sd {r['sd']:,.1f}")
+    print("  ".join(f"{k} {v:,.1f}" for k, v in r["GWh_nat"].items()))
@@ -0,0 +1,94 @@
+"""
+One-page composite dashboard.
+
+    python dashboard.py dashboard.png
+
+KPI cards, category donuts, device donuts, stacked energy / emissions bars
+and the sensitivity bars are laid out on a single GridSpec figure and
+written to file in one render.
+"""
+import sys
+
+from matplotlib.figure import Figure
+
+from model import (CARBON, load_registry, compute, category_totals,
+                   sensitivity, top_sensitive)
+from plots import (plot_stacked_energy, plot_stacked_emissions, donut_chart,
+                   device_shares, kpi_card, barplot)
+
+def PCT(lbl, v, p):
+    return f"{lbl} – {p:.1f}%"
+
+
+def prepare(df, sens=None, carbon=CARBON):
+    """All data the dashboard needs, computed once."""
+    if sens is None:
+        sens = sensitivity(df, carbon)
+    cats = category_totals(df)                       # one groupby
+    top, top_C = top_sensitive(sens, 10)
+    return {
+        "df": df,
+        "cat_energy": cats["GWh_nat"],
+        "cat_emis": cats["kt_nat"],
+        "shares": device_shares(df),                 # one sort
+        "total_E": df["GWh_nat"].sum(),
+        "total_C": df["GWh_nat"].sum() * carbon,
+        "top": top,
+        "top_C": top_C,
+    }
+
+
+def build_dashboard(data, path=None, dpi=100):
+    """
+    Draw every panel on one figure; save to `path` when given.
+
+    data : dict from prepare()
+    """
+    df = data["df"]
+    cats = list(data["shares"])
+    fig = Figure(figsize=(30, 40))
+    gs = fig.add_gridspec(5, 12, height_ratios=[0.7, 1, 1.4, 1.4, 1.2],
+                          left=0.08, right=0.97, top=0.98, bottom=0.03,
+                          hspace=0.45, wspace=0.8)
+
+    # row 0: KPI cards + category donuts
+    kpi_card("UK Residential Electronics Energy", data["total_E"], "GWh",
+             fill="#d7e8ff", ax=fig.add_subplot(gs[0, 0:3]))
+    kpi_card("UK Residential Electronics Emissions", data["total_C"], "kt CO₂e",
+             fill="#ffe3e3", ax=fig.add_subplot(gs[0, 3:6]))
+    # donuts take two of every three columns; the legend fills the third
+    donut_chart(data["cat_energy"], "UK Energy Consumption by Category", PCT,
+                ax=fig.add_subplot(gs[0, 6:8]))
+    donut_chart(data["cat_emis"], "UK CO₂ Emissions by Category", PCT,
+                ax=fig.add_subplot(gs[0, 9:11]))
+
+    # row 1: device donuts, one per category
+    for i, cat in enumerate(cats[:4]):
+        donut_chart(data["shares"][cat], f"{cat} Devices", PCT,
+                    ax=fig.add_subplot(gs[1, 3*i:3*i + 2]))
+
+    # rows 2-3: stacked bars
+    plot_stacked_energy(df, "UK National Appliance Electricity Demand (2025)",
+                        "GWh/year", nat=True, ax=fig.add_subplot(gs[2, :]))
+    plot_stacked_energy(df, "Household Appliance Electricity Consumption (2025)",
+                        "kWh/year", nat=False, ax=fig.add_subplot(gs[3, 0:6]))
+    plot_stacked_emissions(df, "UK National Appliance CO₂ Emissions (2025)",
+                           "kt CO₂e/year", ax=fig.add_subplot(gs[3, 6:12]))
+
+    # row 4: sensitivity
+    barplot(data["top"], "ΔE_GWh", "ΔE_%",
+            "Top-10 Most Sensitive Parameters – Energy (±10 %)",
+            "Maximum Change (GWh)", ax=fig.add_subplot(gs[4, 0:5]))
+    barplot(data["top_C"], "ΔC_kt", "ΔC_%",
+            "Top-10 Most Sensitive Parameters – CO₂ (±10 %)",
+            "Maximum Change (kt CO₂e)", ax=fig.add_subplot(gs[4, 7:12]))
+
+    if path is not None:
+        fig.savefig(path, dpi=dpi)
+    return fig
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else "dashboard.png"
+    build_dashboard(prepare(compute(load_registry())), out)
+    print(f"Dashboard written to {out}")
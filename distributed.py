@@ -0,0 +1,313 @@
+"""
+Distributed execution of Monte Carlo, scenario and household shards.
+
+    python distributed.py worker --port 5555            # on each host
+    python distributed.py mc --N 10000000 --shards 64 --workers a:5555,b:5555
+    python distributed.py mc --N 1000000 --local 4      # localhost stand-in
+
+Work is split into shards.  Each shard gets its own child of
+SeedSequence(seed), so a shard's draws do not depend on where it runs.
+Shards go to workers over a small socket protocol: a 4-byte length, then
+UTF-8 JSON, and workers only run the named tasks in TASKS.  A shard whose
+worker fails or times out goes back on the queue for another worker, up to
+`retries` times.
+
+Workers return partial results (sums, fixed-bin histograms, profile sums).
+The coordinator merges them in shard order, so the output is identical to
+run_local() with the same seed and shard count.  It is not comparable
+draw for draw with a single-node montecarlo.run(seed=...): the shards
+draw from their own seed streams, and percentiles come from a BINS-bin
+histogram, exact to within one bin width of the same draws.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import queue
+import socket
+import socketserver
+import struct
+import threading
+
+import numpy as np
+import pandas as pd
+
+import model
+import profiles
+from model import COLUMNS, PARAMS
+from montecarlo import BINS, hist_summary, mc_bounds, national, sample_kwh
+
+TIMEOUT = 600                  # seconds per shard
+
+
+# ======== PROTOCOL ==================================================
+def send(sock, obj):
+    data = json.dumps(obj).encode()
+    sock.sendall(struct.pack(">I", len(data)) + data)
+
+
+def recv(sock):
+    head = _exactly(sock, 4)
+    return json.loads(_exactly(sock, struct.unpack(">I", head)[0]))
+
+
+def _exactly(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed mid-message")
+        buf += chunk
+    return bytes(buf)
+
+
+# ======== TASKS =====================================================
+def _registry(records):
+    df = pd.DataFrame(records)
+    df["T_standby"] = 1440 - df["T_active"]
+    return df
+
+
+def _seed(s):
+    return np.random.SeedSequence(s["entropy"], spawn_key=s["spawn_key"])
+
+
+def _mc_shard(args):
+    df = _registry(args["registry"])
+    total = national(sample_kwh(df, args["n"], _seed(args["seed"]), args["band"]),
+                     df["Units_mil"].to_numpy(float))
+    counts, _ = np.histogram(total, BINS, range=tuple(args["range"]))
+    return {"n": int(len(total)), "sum": float(total.sum()),
+            "sumsq": float(total @ total), "min": float(total.min()),
+            "max": float(total.max()), "hist": counts.tolist()}
+
+
+def _scenario_shard(args):
+    """National GWh for a block of scenarios, each a (devices, 4) multiplier."""
+    df = _registry(args["registry"])
+    scale = np.asarray(args["scales"], float)             # (k, devices, 4)
+    values = df[PARAMS].to_numpy(float) * scale
+    out = model.kernel(*values.reshape(-1, len(PARAMS)).T)
+    gwh = out[model.KERNEL_COLUMNS.index("GWh_nat")].reshape(len(scale), -1)
+    return {"GWh_nat": gwh.sum(1).tolist()}
+
+
+def _profile_shard(args):
+    df = _registry(args["registry"])
+    load = profiles.simulate(df, args["n"], args["households_mil"],
+                             seed=_seed(args["seed"]))
+    return {"n": args["n"], "load": load.tolist()}
+
+
+TASKS = {"mc": _mc_shard, "scenarios": _scenario_shard,
+         "profiles": _profile_shard}
+
+
+def _merge_mc(parts, args):
+    return hist_summary(parts, args["range"], args.get("q", (5, 50, 95)))
+
+
+def _merge_scenarios(parts, args):
+    return {"GWh_nat": np.concatenate([p["GWh_nat"] for p in parts])}
+
+
+def _merge_profiles(parts, args):
+    n = sum(p["n"] for p in parts)
+    load = sum(np.asarray(p["load"]) * p["n"] for p in parts) / n
+    return {"households": n, "load": load}
+
+
+MERGE = {"mc": _merge_mc, "scenarios": _merge_scenarios,
+         "profiles": _merge_profiles}
+
+
+# ======== SHARDING ==================================================
+def shards(task, df, shards=16, seed=42, **kw):
+    """Split one job into shard argument dicts (JSON-serialisable)."""
+    cols = COLUMNS + (["Category"] if "Category" in df else [])
+    registry = df[cols].to_dict("list")
+    children = np.random.SeedSequence(seed).spawn(shards)
+    seeds = [{"entropy": c.entropy, "spawn_key": list(c.spawn_key)}
+             for c in children]
+    if task == "mc":
+        band = kw.get("band", 0.1)
+        rng = kw.get("range") or mc_bounds(df, band)
+        sizes = [len(a) for a in np.array_split(np.arange(kw["N"]), shards)]
+        return [{"registry": registry, "n": n, "seed": s, "band": band,
+                 "range": list(rng)} for n, s in zip(sizes, seeds) if n]
+    if task == "scenarios":
+        blocks = np.array_split(np.asarray(kw["scales"], float), shards)
+        return [{"registry": registry, "scales": b.tolist()}
+                for b in blocks if len(b)]
+    if task == "profiles":
+        sizes = [len(a) for a in np.array_split(np.arange(kw["households"]), shards)]
+        return [{"registry": registry, "n": n, "seed": s,
+                 "households_mil": kw.get("households_mil", profiles.HOUSEHOLDS_MIL)}
+                for n, s in zip(sizes, seeds) if n]
+    raise ValueError(f"unknown task: {task!r}")
+
+
+def _size(part):
+    return part.get("n") or len(part["scales"])
+
+
+def run_local(task, parts, progress=None, **merge_args):
+    """
+    Single-node run of the same shards (the reference result).  `progress`
+    (a progress.Progress) advances by each finished shard's size.
+    """
+    results = []
+    for a in parts:
+        results.append(TASKS[task](a))
+        if progress is not None:
+            progress.update(_size(a))
+    return MERGE[task](results, {**parts[0], **merge_args})
+
+
+def _call(address, task, args, timeout):
+    host, port = address
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        send(sock, {"task": task, "args": args})
+        reply = recv(sock)
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error", "worker error"))
+    return reply["result"]
+
+
+def run(task, parts, workers, retries=2, timeout=TIMEOUT, progress=None,
+        **merge_args):
+    """
+    Run shards on workers [(host, port), …] and merge.  A worker whose
+    connection fails or times out is dropped; an error reply only fails that
+    attempt.  Either way the shard is retried, by any live worker, up to
+    `retries` times.  `progress` (a progress.Progress) advances by each
+    finished shard's size.
+    """
+    todo = queue.Queue()
+    for i in range(len(parts)):
+        todo.put(i)
+    results, attempts, errors = {}, [0] * len(parts), []
+    lock = threading.Lock()
+    pending = [len(parts)]                 # shards neither done nor given up
+
+    def failed(i, e):
+        with lock:
+            attempts[i] += 1
+            if attempts[i] > retries:
+                errors.append(f"shard {i}: {e}")
+                pending[0] -= 1
+            else:
+                todo.put(i)
+
+    def drive(address):
+        while True:
+            try:
+                i = todo.get(timeout=0.05)
+            except queue.Empty:
+                with lock:
+                    if not pending[0]:
+                        return
+                continue
+            try:
+                r = _call(address, task, parts[i], timeout)
+            except (OSError, ValueError) as e:         # includes timeouts
+                failed(i, e)
+                return                                  # drop this worker
+            except RuntimeError as e:                   # the task itself failed
+                failed(i, e)
+                continue
+            with lock:
+                results[i] = r
+                pending[0] -= 1
+            if progress is not None:
+                progress.update(_size(parts[i]))
+
+    threads = [threading.Thread(target=drive, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    missing = [i for i in range(len(parts)) if i not in results]
+    if missing:
+        raise RuntimeError(f"{len(missing)} shards failed: "
+                           + "; ".join(errors or ["no live workers left"]))
+    return MERGE[task]([results[i] for i in range(len(parts))],
+                       {**parts[0], **merge_args})
+
+
+# ======== WORKERS ===================================================
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            msg = recv(self.request)
+            reply = {"ok": True, "result": TASKS[msg["task"]](msg["args"])}
+        except Exception as e:               # reported back to the coordinator
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        send(self.request, reply)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(host="127.0.0.1", port=5555, ready=None):
+    """Run a worker until killed; `ready` (a Connection) receives the port."""
+    with _Server((host, port), _Handler) as srv:
+        if ready is not None:
+            ready.send(srv.server_address[1])
+        srv.serve_forever()
+
+
+class LocalWorkers:
+    """n worker processes on localhost ephemeral ports (a cluster stand-in)."""
+
+    def __init__(self, n=2):
+        self.procs, self.addresses = [], []
+        for _ in range(n):
+            parent, child = mp.Pipe()
+            p = mp.Process(target=serve, args=("127.0.0.1", 0, child), daemon=True)
+            p.start()
+            self.procs.append(p)
+            self.addresses.append(("127.0.0.1", parent.recv()))
+
+    def __enter__(self):
+        return self.addresses
+
+    def __exit__(self, *exc):
+        for p in self.procs:
+            p.terminate()
+            p.join()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(
+        description=__doc__.splitlines()[1],
+        epilog="mc results match run_local() with the same --seed and "
+               "--shards, not montecarlo.run(seed=...); percentiles come "
+               f"from a {BINS}-bin histogram (exact to one bin width).")
+    ap.add_argument("mode", choices=["worker", "mc"])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=5555)
+    ap.add_argument("--N", type=int, default=1_000_000)
+    ap.add_argument("--shards", type=int, default=16)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--workers", default="", help="host:port,host:port")
+    ap.add_argument("--local", type=int, default=0,
+                    help="start this many localhost workers instead")
+    a = ap.parse_args()
+
+    if a.mode == "worker":
+        serve(a.host, a.port)
+    else:
+        df = model.compute(model.load_registry())
+        parts = shards("mc", df, a.shards, a.seed, N=a.N)
+        if a.local:
+            with LocalWorkers(a.local) as addresses:
+                r = run("mc", parts, addresses)
+        else:
+            addresses = [(h, int(p)) for h, p in
+                         (w.rsplit(":", 1) for w in a.workers.split(","))]
+            r = run("mc", parts, addresses)
+        print(f"{r['N']:,} draws over {len(parts)} shards: "
+              f"mean {r['mean']:,.1f} GWh, sd {r['sd']:,.1f}")
+        print("  ".join(f"{k} {v:,.1f}" for k, v in r["GWh_nat"].items()))
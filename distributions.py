@@ -0,0 +1,188 @@
+"""
+Per-parameter input distributions for the Monte Carlo.
+
+A spec (a dict, or a JSON file read with load_spec) attaches a distribution
+to any of the four model inputs, per device, per category or by default:
+
+    {
+      "defaults":   {"Pmid": {"dist": "triangular", "low": 0.9, "high": 1.1}},
+      "categories": {"Entertainment": {"T_active": {"dist": "lognormal",
+                                                    "sigma": 0.25}}},
+      "devices":    {"Kettle": {"Units_mil": {"dist": "uniform",
+                                              "low": 0.95, "high": 1.05}}}
+    }
+
+Device entries beat category entries, which beat defaults; anything not
+covered stays fixed at the registry value.
+
+    fixed       registry value
+    triangular  low, high [, mode = registry value]
+    uniform     low, high
+    lognormal   sigma [, median = registry value]
+    beta        a, b, low, high
+    empirical   values [, weights]
+
+Numbers are multiples of the registry value unless "relative": false.
+Draws are clipped to BOUNDS (and to an entry's optional "min" / "max").
+"""
+import json
+
+import numpy as np
+
+from model import PARAMS
+
+BOUNDS = {"Pmid": (0, np.inf), "T_active": (0, 1440),
+          "P_standby": (0, np.inf), "Units_mil": (0, np.inf)}
+
+DISTS = ("fixed", "triangular", "uniform", "lognormal", "beta", "empirical")
+
+# the default engine: ±10 % triangular on Pmid only
+DEFAULT_SPEC = {"defaults": {"Pmid": {"dist": "triangular",
+                                      "low": 0.9, "high": 1.1}}}
+
+
+def load_spec(path):
+    with open(path, encoding="utf-8") as f:
+        return validate(json.load(f))
+
+
+def validate(spec):
+    """Check parameter and distribution names; returns the spec."""
+    for section in ("defaults", "categories", "devices"):
+        entries = spec.get(section, {})
+        groups = [entries] if section == "defaults" else entries.values()
+        for params in groups:
+            for p, e in params.items():
+                if p not in PARAMS:
+                    raise KeyError(f"unknown parameter: {p!r}")
+                if e.get("dist", "fixed") not in DISTS:
+                    raise ValueError(f"unknown distribution: {e['dist']!r}")
+    return spec
+
+
+def resolve(df, spec):
+    """The spec entry (or None = fixed) for every device and parameter."""
+    defaults = spec.get("defaults", {})
+    cats = spec.get("categories", {})
+    devs = spec.get("devices", {})
+    category = df["Category"] if "Category" in df else [None] * len(df)
+    out = {p: [] for p in PARAMS}
+    for dev, cat in zip(df["Device"], category):
+        for p in PARAMS:
+            e = (devs.get(dev, {}).get(p) or cats.get(cat, {}).get(p)
+                 or defaults.get(p))
+            out[p].append(e if e and e.get("dist", "fixed") != "fixed" else None)
+    return out
+
+
+# ======== SAMPLING =================================================
+def _scaled(entries, base, key, default=None):
+    """
+    Column vector of entry[key] for a group, scaled by base if relative.
+    A missing key is `default` times the registry value, relative or not.
+    """
+    v = np.array([e.get(key, np.nan) for e in entries], dtype=float)
+    rel = np.array([e.get("relative", True) for e in entries])
+    v = np.where(rel, v * base, v)
+    if default is not None:
+        missing = np.array([key not in e for e in entries])
+        v = np.where(missing, default * base, v)
+    return v[:, None]
+
+
+def _draw(kind, entries, base, N, rng):
+    """One batched draw of shape (len(entries), N)."""
+    k = len(entries)
+    if kind == "triangular":
+        lo, hi = _scaled(entries, base, "low"), _scaled(entries, base, "high")
+        flat = hi <= lo                   # e.g. a zero registry value
+        x = rng.triangular(lo, _scaled(entries, base, "mode", 1.0),
+                           np.where(flat, lo + 1, hi), size=(k, N))
+        return np.where(flat, lo, x)
+    if kind == "uniform":
+        return rng.uniform(_scaled(entries, base, "low"),
+                           _scaled(entries, base, "high"), size=(k, N))
+    if kind == "lognormal":
+        median = _scaled(entries, base, "median", 1.0)
+        sigma = np.array([e["sigma"] for e in entries], float)[:, None]
+        return median * np.exp(sigma * rng.standard_normal((k, N)))
+    if kind == "beta":
+        a = np.array([e["a"] for e in entries], float)[:, None]
+        b = np.array([e["b"] for e in entries], float)[:, None]
+        lo, hi = _scaled(entries, base, "low"), _scaled(entries, base, "high")
+        return lo + (hi - lo) * rng.beta(a, b, size=(k, N))
+    if kind == "empirical":
+        out = np.empty((k, N))
+        for i, e in enumerate(entries):
+            v = np.asarray(e["values"], float)
+            v = v * base[i] if e.get("relative", True) else v
+            w = e.get("weights")
+            out[i] = rng.choice(v, N, p=None if w is None
+                                else np.asarray(w, float) / np.sum(w))
+        return out
+    raise ValueError(f"unknown distribution: {kind!r}")
+
+
+def means(df, spec):
+    """
+    Analytic mean of every parameter under the spec, {param: (devices,)},
+    ignoring clipping to BOUNDS.  Used as the known mean of control variates.
+    """
+    entries = resolve(df, validate(spec))
+    out = {}
+    for p in PARAMS:
+        base = df[p].to_numpy(float)
+        m = base.copy()
+        for i, e in enumerate(entries[p]):
+            if e is None:
+                continue
+            b, kind = base[i:i+1], e["dist"]
+            if kind == "empirical":
+                v = np.asarray(e["values"], float)
+                v = v * b[0] if e.get("relative", True) else v
+                m[i] = np.average(v, weights=e.get("weights"))
+                continue
+            lo, hi = _scaled([e], b, "low", 0.0)[0, 0], _scaled([e], b, "high", 0.0)[0, 0]
+            if kind == "triangular":
+                m[i] = lo if hi <= lo else (lo + _scaled([e], b, "mode", 1.0)[0, 0] + hi) / 3
+            elif kind == "uniform":
+                m[i] = (lo + hi) / 2
+            elif kind == "lognormal":
+                m[i] = _scaled([e], b, "median", 1.0)[0, 0] * np.exp(e["sigma"]**2 / 2)
+            elif kind == "beta":
+                m[i] = lo + (hi - lo) * e["a"] / (e["a"] + e["b"])
+        out[p] = m
+    return out
+
+
+def sample(df, spec, N=10_000, seed=42, rng=None):
+    """
+    Draw every parameter named in the spec.
+
+    Returns {param: array}; fixed parameters are (devices, 1) columns that
+    broadcast, sampled ones are (devices, N).  Devices sharing a parameter
+    and distribution are drawn in a single call.
+    """
+    rng = np.random.default_rng(seed) if rng is None else rng
+    entries = resolve(df, validate(spec))
+    out = {}
+    for p in PARAMS:
+        base = df[p].to_numpy(float)
+        sampled = [i for i, e in enumerate(entries[p]) if e is not None]
+        if not sampled:
+            out[p] = base[:, None]
+            continue
+        arr = (np.empty((len(base), N)) if len(sampled) == len(base)
+               else np.repeat(base[:, None], N, axis=1))
+        kinds = list(dict.fromkeys(entries[p][i]["dist"] for i in sampled))
+        for kind in kinds:
+            rows = [i for i in sampled if entries[p][i]["dist"] == kind]
+            arr[rows] = _draw(kind, [entries[p][i] for i in rows],
+                              base[rows], N, rng)
+        lo = np.array([max(BOUNDS[p][0], (e or {}).get("min", -np.inf))
+                       for e in entries[p]])[:, None]
+        hi = np.array([min(BOUNDS[p][1], (e or {}).get("max", np.inf))
+                       for e in entries[p]])[:, None]
+        np.clip(arr, lo, hi, out=arr)
+        out[p] = arr
+    return out
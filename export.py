@@ -0,0 +1,152 @@
+"""
+Columnar export of model results (requires pyarrow).
+
+    python export.py results/
+
+Writes Arrow datasets with a fixed schema under `root/<table>/`, partitioned
+hive-style by scenario and Category:
+
+    devices         combined_df (inputs and every computed column)
+    categories      GWh / kt per category
+    sensitivity     ±10 % swing per device-parameter
+    mc_percentiles  Monte Carlo P5/P50/P95 (or any q) per device
+    mc_samples      Monte Carlo household kWh samples, one row per draw
+
+format="ipc" (Arrow IPC / Feather v2, uncompressed) can be memory-mapped and
+read zero-copy; format="parquet" is smaller on disk.
+"""
+import sys
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+
+import model
+import montecarlo
+
+PARTITIONING = ["scenario", "Category"]
+F64, STR = pa.float64(), pa.string()
+DICT = pa.dictionary(pa.int32(), pa.string())     # repeated labels
+
+SCHEMAS = {
+    "devices": pa.schema(
+        [("scenario", STR), ("Category", STR), ("Device", DICT)]
+        + [(c, F64) for c in [
+            "Pmid", "T_active", "P_standby", "Units_mil", "T_standby",
+            "kWh_hh_active", "kWh_hh_standby", "kWh_hh",
+            "kWh_hh_active_min", "kWh_hh_active_max",
+            "GWh_nat_active", "GWh_nat_standby", "GWh_nat",
+            "GWh_nat_active_min", "GWh_nat_active_max",
+            "kt_nat", "kt_nat_active", "kt_nat_standby",
+            "kt_nat_active_min", "kt_nat_active_max"]]),
+    "categories": pa.schema([("scenario", STR), ("Category", STR),
+                             ("GWh_nat", F64), ("kt_nat", F64)]),
+    "sensitivity": pa.schema([("scenario", STR), ("Category", STR),
+                              ("Device", DICT), ("Parameter", DICT),
+                              ("ΔE_GWh", F64), ("ΔE_%", F64),
+                              ("ΔC_kt", F64), ("ΔC_%", F64)]),
+    "mc_percentiles": pa.schema([("scenario", STR), ("Category", STR),
+                                 ("Device", DICT), ("percentile", F64),
+                                 ("kWh_hh", F64), ("GWh_nat", F64)]),
+    "mc_samples": pa.schema([("scenario", STR), ("Category", STR),
+                             ("Device", DICT), ("sample", pa.int64()),
+                             ("kWh_hh", F64)]),
+}
+
+
+# ======== TABLE BUILDERS ===========================================
+def _table(name, df, scenario):
+    """DataFrame → Arrow table cast to the stable schema for `name`."""
+    schema = SCHEMAS[name]
+    cols = {}
+    for field in schema:
+        if field.name == "scenario":
+            cols["scenario"] = pa.array(np.full(len(df), scenario, dtype=object))
+        else:
+            cols[field.name] = pa.array(df[field.name].to_numpy())
+    return pa.table(cols).cast(schema)
+
+def devices_table(df, scenario="base"):
+    return _table("devices", df, scenario)
+
+def categories_table(df, scenario="base"):
+    return _table("categories", model.category_totals(df).reset_index(), scenario)
+
+def sensitivity_table(sens, scenario="base"):
+    return _table("sensitivity", sens, scenario)
+
+def mc_percentiles_table(df, mc, q=(5, 50, 95), scenario="base"):
+    """mc : household kWh samples, shape (devices, N)."""
+    pq = np.percentile(mc, q, axis=1)                      # (len(q), devices)
+    units = df["Units_mil"].to_numpy(float)
+    n_q, n_d = pq.shape
+    return pa.table({
+        "scenario": pa.array(np.full(n_q*n_d, scenario, dtype=object)),
+        "Category": pa.array(np.tile(df["Category"].to_numpy(), n_q)),
+        "Device":   pa.array(np.tile(df["Device"].to_numpy(), n_q)),
+        "percentile": np.repeat(np.asarray(q, float), n_d),
+        "kWh_hh":   pq.ravel(),
+        "GWh_nat":  (pq * units).ravel(),
+    }).cast(SCHEMAS["mc_percentiles"])
+
+def mc_samples_table(df, mc, scenario="base"):
+    """Long format; the sample values are handed to Arrow without copying."""
+    n_d, n = mc.shape
+    codes = np.repeat(np.arange(n_d, dtype=np.int32), n)
+    dev = pa.DictionaryArray.from_arrays(codes, pa.array(df["Device"].to_numpy()))
+    cat_names, cat_idx = np.unique(df["Category"].to_numpy(), return_inverse=True)
+    cat = pa.DictionaryArray.from_arrays(cat_idx.astype(np.int32)[codes],
+                                         pa.array(cat_names))
+    return pa.table({
+        "scenario": pa.DictionaryArray.from_arrays(np.zeros(n_d*n, np.int32),
+                                                   pa.array([scenario])),
+        "Category": cat,
+        "Device":   dev,
+        "sample":   np.tile(np.arange(n, dtype=np.int64), n_d),
+        "kWh_hh":   np.ascontiguousarray(mc, dtype=np.float64).ravel(),
+    }).cast(SCHEMAS["mc_samples"])
+
+
+# ======== WRITE / READ =============================================
+def write(table, root, name, format="parquet"):
+    """Append `table` to the dataset root/name, partitioned by scenario/Category."""
+    partitioning = [c for c in PARTITIONING if c in table.column_names]
+    part = [str(s).replace("/", "_")
+            for s in table.column("scenario").unique().to_pylist()]
+    ds.write_dataset(
+        table, f"{root}/{name}", format=format,
+        schema=SCHEMAS[name],
+        partitioning=partitioning, partitioning_flavor="hive",
+        basename_template=f"{name}-{'-'.join(map(str, part))}-{{i}}."
+                          + ("arrow" if format == "ipc" else format),
+        existing_data_behavior="overwrite_or_ignore")
+
+def read(root, name, format="parquet", filter=None, columns=None):
+    """
+    Read a dataset back as an Arrow table.  IPC datasets are memory-mapped,
+    so numeric columns are not copied off disk.
+    """
+    dataset = ds.dataset(f"{root}/{name}", format=format,
+                         partitioning="hive", schema=SCHEMAS[name],
+                         filesystem=fs.LocalFileSystem(use_mmap=True))
+    return dataset.to_table(filter=filter, columns=columns)
+
+def export_run(root, df, sens=None, mc=None, scenario="base",
+               format="parquet", q=(5, 50, 95)):
+    """Write every table for one scenario."""
+    write(devices_table(df, scenario), root, "devices", format)
+    write(categories_table(df, scenario), root, "categories", format)
+    if sens is not None:
+        write(sensitivity_table(sens, scenario), root, "sensitivity", format)
+    if mc is not None:
+        write(mc_percentiles_table(df, mc, q, scenario), root,
+              "mc_percentiles", format)
+        write(mc_samples_table(df, mc, scenario), root, "mc_samples", format)
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else "results"
+    df = model.compute(model.load_registry())
+    export_run(out, df, model.sensitivity(df), montecarlo.sample_kwh(df))
+    print(f"Results written to {out}/")
@@ -0,0 +1,301 @@
+"""
+Streaming ingestion of a product-level appliance database.
+
+    python ingest.py products.csv --workers 8
+    python ingest.py products.jsonl --out registry.csv
+
+The input is a CSV (with header) or JSON Lines dump with one row per product
+model: a product type, on-mode power (W), standby power (W) and optionally a
+sales weight.  Column names are set with `columns=` / --columns.
+
+The file is split into byte ranges that are parsed in parallel, each in
+blocks of `chunk_bytes`, so memory stays constant whatever the file size.
+Every block is folded into sales-weighted power histograms per model device
+type (fixed log-spaced bins), and the histograms are merged at the end.
+From them `summary()` gives the weighted mean and percentiles that replace
+the hand-typed Pmid / P_standby and set per-device Monte Carlo bands.
+"""
+import argparse
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import model
+
+# default column names in the dump
+COLUMNS = {"type": "product_type", "on": "on_mode_w",
+           "standby": "standby_w", "weight": "units_sold"}
+
+# product type (lower case) → model device; exact match first, then the
+# first key (in this order, so specific keys come first) contained in it
+DEVICE_MAP = {
+    "fridge": "Fridge/Freezer", "freezer": "Fridge/Freezer",
+    "refrigerator": "Fridge/Freezer", "kettle": "Kettle",
+    "dishwasher": "Dishwasher", "air fryer": "Air Fryer",
+    "hob": "Electric Hob", "microwave": "Microwave",
+    "coffee": "Coffee Machine", "rice cooker": "Rice Cooker",
+    "toaster": "Toaster", "washing machine": "Washing Machine",
+    "washer": "Washing Machine", "oven": "Electric Oven",
+    "router": "Wifi Router", "desktop": "Desktop Computer",
+    "laptop": "Laptop", "notebook": "Laptop", "monitor": "Monitor",
+    "projector": "Projector", "printer": "Printer",
+    "smartphone": "Smartphones", "feature phone": "Feature Phone",
+    "tablet": "Tablets", "smart speaker": "Smart Speaker",
+    "handheld console": "Gaming Console (Handheld)",
+    "games console": "Gaming Console (Home)",
+    "gaming console": "Gaming Console (Home)",
+    "oled": "TV (OLED)", "lcd": "TV (LCD)", "led tv": "TV (LCD)",
+    "television": "TV (LCD)",
+    "set-top box": "Set-Top Box", "set top box": "Set-Top Box",
+}
+
+EDGES = np.concatenate([[0.0], np.geomspace(1e-3, 1e5, 4096)])   # W
+CHUNK_BYTES = 32 << 20
+
+
+# ======== ACCUMULATOR ==============================================
+class PowerHistogram:
+    """Sales-weighted on-mode / standby power histograms per device."""
+
+    def __init__(self, devices):
+        self.devices = list(devices)
+        shape = (len(self.devices), len(EDGES) - 1)
+        self.on = np.zeros(shape)
+        self.standby = np.zeros(shape)
+        self.weight = np.zeros(len(self.devices))
+        self.sum_on = np.zeros(len(self.devices))
+        self.sum_standby = np.zeros(len(self.devices))
+        self.rows = np.zeros(len(self.devices), dtype=np.int64)
+        self.unmapped = 0
+        self.invalid = 0
+
+    def add(self, dev, on, standby, w):
+        """Fold one parsed block in; dev holds device indices (-1 = unmapped)."""
+        ok = (dev >= 0) & np.isfinite(on) & np.isfinite(standby) \
+             & np.isfinite(w) & (on >= 0) & (standby >= 0) & (w > 0)
+        self.unmapped += int((dev < 0).sum())
+        self.invalid += int(((dev >= 0) & ~ok).sum())
+        dev, on, standby, w = dev[ok], on[ok], standby[ok], w[ok]
+
+        n_dev, n_bin = self.on.shape
+        for hist, p in ((self.on, on), (self.standby, standby)):
+            b = np.clip(np.searchsorted(EDGES, p, side="right") - 1, 0, n_bin - 1)
+            hist += np.bincount(dev * n_bin + b, weights=w,
+                                minlength=n_dev * n_bin).reshape(n_dev, n_bin)
+        self.weight += np.bincount(dev, weights=w, minlength=n_dev)
+        self.sum_on += np.bincount(dev, weights=w * on, minlength=n_dev)
+        self.sum_standby += np.bincount(dev, weights=w * standby, minlength=n_dev)
+        self.rows += np.bincount(dev, minlength=n_dev)
+
+    def merge(self, other):
+        for name in ("on", "standby", "weight", "sum_on", "sum_standby", "rows"):
+            getattr(self, name).__iadd__(getattr(other, name))
+        self.unmapped += other.unmapped
+        self.invalid += other.invalid
+        return self
+
+
+def _quantiles(hist, q):
+    """Weighted percentiles from histogram rows, linear within each bin."""
+    out = np.full((hist.shape[0], len(q)), np.nan)
+    cum = np.cumsum(hist, axis=1)
+    for i, c in enumerate(cum):
+        if c[-1] <= 0:
+            continue
+        target = np.asarray(q, float) / 100 * c[-1]
+        b = np.searchsorted(c, target, side="left")
+        prev = np.where(b > 0, c[b - 1], 0.0)
+        frac = (target - prev) / np.where(hist[i, b] > 0, hist[i, b], 1.0)
+        out[i] = EDGES[b] + frac * (EDGES[b + 1] - EDGES[b])
+    return out
+
+
+# ======== PARSING ==================================================
+def _mapper(device_map, devices):
+    """Product type → device index, memoised per distinct product type."""
+    index = {d: i for i, d in enumerate(devices)}
+    keys = list(device_map)
+    memo = {}
+
+    def lookup(t):
+        if t not in memo:
+            s = str(t).strip().lower()
+            dev = device_map.get(s) or next(
+                (device_map[k] for k in keys if k in s), None)
+            memo[t] = index.get(dev, -1)
+        return memo[t]
+
+    def map_types(types):
+        types = pd.Series(types, dtype="category")
+        codes = np.array([lookup(t) for t in types.cat.categories], dtype=np.int64)
+        c = types.cat.codes.to_numpy()
+        return np.where(c >= 0, codes[c] if len(codes) else -1, -1)
+    return map_types
+
+
+def _parse(block, fmt, header, columns):
+    wanted = [c for c in columns.values() if c]
+    if fmt == "csv":
+        return pd.read_csv(io.BytesIO(block), header=None, names=header,
+                           usecols=lambda c: c in wanted)
+    return pd.read_json(io.BytesIO(block), lines=True)
+
+
+def _blocks(path, start, end, chunk_bytes):
+    """Whole-line blocks of about chunk_bytes for lines starting in [start, end)."""
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()                  # skip the line owned by the previous range
+        pos = f.tell()
+        while pos < end:
+            block = f.read(min(chunk_bytes, end - pos))
+            if not block:
+                break
+            if not block.endswith(b"\n"):
+                block += f.readline()     # finish the last line
+            pos = f.tell()
+            yield block
+
+
+def scan(path, start, end, fmt="csv", header=None, columns=COLUMNS,
+         device_map=DEVICE_MAP, devices=None, chunk_bytes=CHUNK_BYTES):
+    """Histogram one byte range of the file."""
+    devices = list(model.load_registry()["Device"]) if devices is None else devices
+    acc = PowerHistogram(devices)
+    map_types = _mapper(device_map, devices)
+    for block in _blocks(path, start, end, chunk_bytes):
+        d = _parse(block, fmt, header, columns)
+        if d.empty:
+            continue
+        w = (d[columns["weight"]].to_numpy(float)
+             if columns.get("weight") in d else np.ones(len(d)))
+        acc.add(map_types(d[columns["type"]]),
+                pd.to_numeric(d[columns["on"]], errors="coerce").to_numpy(float),
+                pd.to_numeric(d[columns["standby"]], errors="coerce").to_numpy(float),
+                w)
+    return acc
+
+
+def _scan_job(args):
+    return scan(*args)
+
+
+def ingest(path, fmt=None, columns=COLUMNS, device_map=DEVICE_MAP,
+           devices=None, workers=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Stream `path` through `workers` processes and return the merged
+    PowerHistogram.  fmt is "csv" or "jsonl" (default: from the extension).
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".json", ".ndjson"))
+                  else "csv")
+    devices = list(model.load_registry()["Device"]) if devices is None else devices
+    size = os.path.getsize(path)
+    header, first = None, 0
+    if fmt == "csv":
+        with open(path, "rb") as f:
+            line = f.readline()
+        header = pd.read_csv(io.BytesIO(line), nrows=0).columns.tolist()
+        first = len(line)
+
+    workers = workers or os.cpu_count() or 1
+    n_ranges = max(1, min(workers * 4, (size - first) // chunk_bytes + 1))
+    bounds = np.linspace(first, size, n_ranges + 1).astype(np.int64)
+    jobs = [(path, int(a), int(b), fmt, header, columns, device_map, devices,
+             chunk_bytes) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    acc = PowerHistogram(devices)
+    if workers == 1 or len(jobs) == 1:
+        for job in jobs:
+            acc.merge(_scan_job(job))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            for part in pool.map(_scan_job, jobs):
+                acc.merge(part)
+    return acc
+
+
+# ======== RESULTS ==================================================
+def summary(acc, q=(5, 50, 95)):
+    """
+    Per-device sales-weighted power statistics.
+
+    Pmid / P_standby are weighted means (what national energy depends on);
+    Pmin / Pmax are the outer percentiles of on-mode power, for use as
+    Monte Carlo bands.
+    """
+    w = np.where(acc.weight > 0, acc.weight, np.nan)
+    on_q = _quantiles(acc.on, q)
+    sb_q = _quantiles(acc.standby, q)
+    out = pd.DataFrame({"Device": acc.devices, "rows": acc.rows,
+                        "weight": acc.weight,
+                        "Pmid": acc.sum_on / w,
+                        "P_standby": acc.sum_standby / w})
+    for j, p in enumerate(q):
+        out[f"Pmid_P{p}"] = on_q[:, j]
+    for j, p in enumerate(q):
+        out[f"P_standby_P{p}"] = sb_q[:, j]
+    out["Pmin"] = np.minimum(on_q[:, 0], out["Pmid"])
+    out["Pmax"] = np.maximum(on_q[:, -1], out["Pmid"])
+    return out[acc.rows > 0].reset_index(drop=True)
+
+
+def apply_to_registry(df, stats):
+    """
+    Copy of `df` with Pmid, P_standby and Pmin/Pmax taken from `stats` for
+    every device it covers; other devices keep Pmid and a ±10 % band.
+    """
+    df = df.copy()
+    df["Pmin"], df["Pmax"] = df["Pmid"]*0.9, df["Pmid"]*1.1
+    s = stats.set_index("Device")
+    mask = df["Device"].isin(s.index)
+    for col in ("Pmid", "P_standby", "Pmin", "Pmax"):
+        df[col] = df[col].astype(float)
+        df.loc[mask, col] = df.loc[mask, "Device"].map(s[col]).to_numpy()
+    return df
+
+
+def comparison(df, stats):
+    """Registry vs database power, in the Δ report format."""
+    val = df[df.Device.isin(stats.Device)][["Device", "Pmid", "P_standby"]]
+    val = val.merge(stats[["Device", "Pmid", "P_standby"]], on="Device",
+                    suffixes=("", "_db"))
+    val["Δ"] = 100 * (val.Pmid_db - val.Pmid) / val.Pmid
+    return val
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("path")
+    ap.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES >> 20)
+    ap.add_argument("--columns", default=None,
+                    help="type,on,standby[,weight] column names")
+    ap.add_argument("--out", default=None, help="write the updated registry CSV")
+    a = ap.parse_args()
+
+    columns = COLUMNS
+    if a.columns:
+        columns = dict(zip(["type", "on", "standby", "weight"],
+                           a.columns.split(",")))
+    acc = ingest(a.path, a.format, columns, workers=a.workers,
+                 chunk_bytes=a.chunk_mb << 20)
+    stats = summary(acc)
+    base = model.load_registry()
+
+    print(f"{int(acc.rows.sum()):,} products mapped, {acc.unmapped:,} unmapped, "
+          f"{acc.invalid:,} invalid")
+    print("\nRegistry vs product database (W)")
+    print(comparison(base, stats).to_string(
+        index=False,
+        formatters={"Pmid": "{:,.2f}".format, "Pmid_db": "{:,.2f}".format,
+                    "P_standby": "{:,.2f}".format,
+                    "P_standby_db": "{:,.2f}".format,
+                    "Δ": lambda x: f"{x:+.1f}%"}))
+    if a.out:
+        apply_to_registry(base, stats).to_csv(a.out, index=False)
+        print(f"\nRegistry written to {a.out}")
@@ -0,0 +1,231 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# ── 1. INPUT ──────────────────────────────
+CARBON = 0.22535  # kgCO2/kWh
+COLUMNS = ["Device", "Pmid", "T_active", "P_standby", "Units_mil"]
+PARAMS = ["Pmid", "T_active", "P_standby", "Units_mil"]
+
+# Device, Pmid(W), T_active(min), P_standby(W), Units_mil
+REGISTRY = {
+    "Kitchen": [
+        ("Fridge/Freezer", 150, 480, 15, 21.03), ("Kettle", 3000, 12, 0.00, 27.00),
+        ("Dishwasher", 800, 51, 0.50, 14.2), ("Air Fryer", 1500, 25, 0.5, 16.50),
+        ("Electric Hob", 1800, 20, 1, 14.8), ("Microwave", 1000, 11, 2, 25.60),
+        ("Coffee Machine", 1400, 3, 0.77, 16.20), ("Rice Cooker", 700, 30, 0.00, 4.50),
+        ("Toaster", 900, 9, 0.00, 21.90), ("Washing Machine", 700, 34, 1.00, 27.50),
+        ("Electric Oven", 550, 35, 2, 20.9)
+    ],
+    "Office": [
+        ("Wifi Router", 10.88, 1440, 0, 26.98), ("Desktop Computer", 100, 138, 0.5, 3.84),
+        ("Laptop", 42.0, 219, 0.5, 31.862), ("Monitor", 21.4, 138, 0.3, 19.2),
+        ("Projector", 225, 30, 0.3, 0.6), ("Printer", 26.64, 0.15, 1.4, 8.11)
+    ],
+    "Personal": [
+        ("Smartphones", 5.0, 165.5, 0.04, 64.93),
+        ("Feature Phone", 1.75, 112.8, 0.075, 0.4101),
+        ("Tablets", 12, 171.8, 0.05, 34.96),
+        ("Smart Speaker", 2.4, 36, 1.3, 9.37)
+    ],
+    "Entertainment": [
+        ("Gaming Console (Handheld)", 9.8, 101.8, 0.08, 2.44),
+        ("Gaming Console (Home)", 214.3, 150, 0.31, 9.77),
+        ("TV (LCD)", 50.4, 270, 0.5, 52.3), ("TV (OLED)", 81, 270, 0.5, 1.05),
+        ("Set-Top Box", 20.1, 196, 0.4, 26.049)
+    ],
+}
+
+
+def load_registry(registry=None):
+    """Combine the per-category device tables into one DataFrame."""
+    registry = REGISTRY if registry is None else registry
+    frames = []
+    for cat, rows in registry.items():
+        d = pd.DataFrame(rows, columns=COLUMNS)
+        d["Category"] = cat
+        frames.append(d)
+    df = pd.concat(frames, ignore_index=True)
+    df["T_standby"] = 1440 - df["T_active"]
+    return df
+
+
+def input_hash(df):
+    """SHA-256 of the registry inputs (device, category and the four parameters)."""
+    h = hashlib.sha256("\x1f".join(df["Device"]).encode())
+    if "Category" in df:
+        h.update("\x1f".join(df["Category"]).encode())
+    h.update(df[PARAMS].to_numpy(float).tobytes())
+    return h.hexdigest()
+
+
+# ======== ENERGY & EMISSIONS CALC =================================
+# P [W] · T [min/day] · FACTOR = kWh over `days` days
+def annual_factor(days=365):
+    return days / 60 / 1000
+
+# rows of the kernel output, in order
+KERNEL_COLUMNS = [
+    "T_standby",
+    "kWh_hh_active", "kWh_hh_standby", "kWh_hh",
+    "kWh_hh_active_min", "kWh_hh_active_max",
+    "GWh_nat_active", "GWh_nat_standby", "GWh_nat",
+    "GWh_nat_active_min", "GWh_nat_active_max",
+    "kt_nat", "kt_nat_active", "kt_nat_standby",
+    "kt_nat_active_min", "kt_nat_active_max",
+]
+
+
+def kernel(Pmid, T_active, P_standby, Units_mil, carbon=CARBON, band=0.1,
+           days=365, out=None):
+    """
+    The energy model as one vectorised call: each output column is a ufunc
+    over the device arrays, written into rows of one output array.
+
+    Inputs are per-device arrays (`days` may be a scalar or per device),
+    converted to float64 (a copy unless they already are); broadcasting
+    scalar or per-device `days` may allocate further temporaries.
+    Returns `out`, a (len(KERNEL_COLUMNS), n) float64 array; pass a
+    preallocated one to reuse memory across calls.
+    """
+    Pmid, T, Ps, U = (np.asarray(a, dtype=np.float64)
+                      for a in (Pmid, T_active, P_standby, Units_mil))
+    if out is None:
+        out = np.empty((len(KERNEL_COLUMNS), len(Pmid)))
+    (Ts, a, s, hh, a_min, a_max, Ga, Gs, G, Ga_min, Ga_max,
+     kt, kt_a, kt_s, kt_a_min, kt_a_max) = out
+    k = annual_factor(days)
+
+    np.subtract(1440, T, out=Ts)
+    np.multiply(Pmid, T, out=a);  a *= k
+    np.multiply(Ps, Ts, out=s);   s *= k
+    np.add(a, s, out=hh)
+    np.multiply(a, 1 - band, out=a_min)
+    np.multiply(a, 1 + band, out=a_max)
+
+    for hh_row, nat_row, kt_row in ((a, Ga, kt_a), (s, Gs, kt_s), (hh, G, kt),
+                                    (a_min, Ga_min, kt_a_min),
+                                    (a_max, Ga_max, kt_a_max)):
+        np.multiply(hh_row, U, out=nat_row)
+        np.multiply(nat_row, carbon, out=kt_row)
+    return out
+
+
+def energy(Pmid, T_active, P_standby, days=365):
+    """
+    Active and stand-by kWh per unit owned over `days` days, the formula of
+    kernel() without the national and emission columns.  Inputs broadcast.
+    """
+    k = annual_factor(days)
+    return Pmid * T_active * k, P_standby * (1440 - T_active) * k
+
+
+def gradient(Pmid, T_active, P_standby, Units_mil, days=365):
+    """
+    Exact partial derivatives of national GWh per device, shape (n, 4) in
+    PARAMS order.  The model is linear in each parameter, so p·∂E/∂p·f is
+    the exact change for a fractional step f.  Inputs broadcast, so
+    (devices, samples) draws give (devices, samples, 4); the last column
+    is the household kWh per unit.
+    """
+    Pmid, T, Ps, U = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64)
+                      for a in (Pmid, T_active, P_standby, Units_mil)))
+    k = annual_factor(days)
+    g = np.empty((len(PARAMS),) + Pmid.shape)          # parameter-major rows
+    Uk = U * k
+    np.multiply(Uk, T, out=g[0])                        # ∂E/∂Pmid
+    np.multiply(Uk, Pmid - Ps, out=g[1])                # ∂E/∂T_active
+    np.multiply(Uk, 1440 - T, out=g[2])                 # ∂E/∂P_standby
+    g[3] = (Pmid*T + Ps*(1440 - T)) * k                 # ∂E/∂Units_mil
+    return np.moveaxis(g, 0, -1)
+
+
+def compute(df, carbon=CARBON, days=365):
+    """Add household, national and emissions columns to `df` (in place)."""
+    out = kernel(*(df[p] for p in PARAMS), carbon=carbon, days=days)
+    for name, row in zip(KERNEL_COLUMNS, out):
+        df[name] = row
+    return df
+
+
+def apply_overrides(df, overrides):
+    """
+    Return a copy of `df` with per-device parameter overrides applied.
+
+    overrides : {device: {param: value}}
+    """
+    df = df.copy()
+    for dev, values in (overrides or {}).items():
+        mask = df["Device"] == dev
+        if not mask.any():
+            raise KeyError(f"unknown device: {dev!r}")
+        for p, v in values.items():
+            if p not in PARAMS:
+                raise KeyError(f"unknown parameter: {p!r}")
+            df[p] = df[p].astype(float)
+            df.loc[mask, p] = float(v)
+    return df
+
+
+def category_totals(df):
+    """GWh and kt per category (one groupby)."""
+    return df.groupby("Category")[["GWh_nat", "kt_nat"]].sum()
+
+
+# ======== SENSITIVITY ANALYSIS (ENERGY + CO₂)  ====================
+def sensitivity(df, carbon=CARBON, step=0.1, days=365):
+    """Maximum ±10 % swing for every device-parameter, largest first."""
+    base_E = df["GWh_nat"].sum()
+    base_C = base_E * carbon
+
+    # linear in each parameter: |p · ∂E/∂p| · step is the exact swing
+    values = df[PARAMS].to_numpy(float)
+    ΔE = np.abs(gradient(*values.T, days=days) * values).ravel() * step
+    ΔC = ΔE * carbon
+
+    n = len(df)
+    return (pd.DataFrame({
+                "Device":    np.repeat(df["Device"].to_numpy(), len(PARAMS)),
+                "Category":  np.repeat(df["Category"].to_numpy(), len(PARAMS)),
+                "Parameter": np.tile(PARAMS, n),
+                "ΔE_GWh":    ΔE,
+                "ΔE_%":      ΔE / base_E * 100,
+                "ΔC_kt":     ΔC,
+                "ΔC_%":      ΔC / base_C * 100,
+            })
+            .sort_values("ΔE_GWh", ascending=False, kind="stable"))
+
+
+def top_sensitive(sens, n=10):
+    """Top-n rows by energy swing, and the same rows ranked by CO₂ swing."""
+    top   = sens.nlargest(n, "ΔE_GWh")
+    top_C = top.set_index(["Device", "Parameter"]).loc[
+               sens.set_index(["Device", "Parameter"]).nlargest(n, "ΔC_kt").index
+           ].reset_index()
+    return top, top_C
+
+
+# ── ECUK validation benchmarks (GWh / yr) ─────────────────────────
+ECUK = {
+    "Kitchen": {
+        "Fridge/Freezer": 6019, "Kettle": 4843, "Dishwasher": 3502,
+        "Washing Machine": 6773, "Microwave": 2507, "Electric Oven": 2008,
+        "Electric Hob": 2657
+    },
+    "Office": {
+        "Desktop Computer": 668, "Laptop": 1982, "Monitor": 353, "Printer": 69
+    },
+    "Entertainment": {
+        "Gaming Console (Home)": 1677, "TV (LCD)": 1252, "TV (OLED)": 56,
+        "Set-Top Box": 1134
+    },
+}
+
+
+def validation_table(df, ecuk):
+    """Model vs benchmark rows with Δ (%) for the devices in `ecuk`."""
+    val = df[df.Device.isin(ecuk)].copy()
+    val["ECUK"] = val.Device.map(ecuk)
+    val["Δ"] = 100 * (val.GWh_nat - val.ECUK) / val.ECUK
+    return val
@@ -0,0 +1,494 @@
+import numpy as np
+from scipy.special import ndtr, ndtri
+
+import distributions
+from model import CARBON, PARAMS, annual_factor, compute, energy, gradient
+
+# Compact mode samples and stores kWh in float32 but accumulates national
+# totals in float64.  Relative error on totals and percentiles stays well
+# inside this bound (see precision_report).
+COMPACT_RTOL = 1e-5
+CHUNK = 1 << 16           # columns per float64 accumulation block
+BINS = 4096               # histogram bins for streamed / merged percentiles
+
+
+def triangular_ppf(u, left, mode, right):
+    """Inverse CDF of the triangular distribution; keeps the dtype of `u`."""
+    width = right - left
+    fc = (mode - left) / width
+    lo = left + np.sqrt(u * width * (mode - left))
+    hi = right - np.sqrt((1 - u) * width * (right - mode))
+    return np.where(u < fc, lo, hi)
+
+
+# ── Gaussian copula ──────────────────────────────────────────────────
+def correlation(df, within=0.0, between=0.0, pairs=None):
+    """
+    Device correlation matrix with a block structure per category:
+    `within` for two devices in the same category, `between` otherwise.
+    `pairs` {(device_a, device_b): rho} overrides single entries.
+    """
+    cat = df["Category"].to_numpy() if "Category" in df else np.zeros(len(df))
+    corr = np.where(cat[:, None] == cat[None, :], within, between).astype(float)
+    idx = {d: i for i, d in enumerate(df["Device"])}
+    for (a, b), rho in (pairs or {}).items():
+        corr[idx[a], idx[b]] = corr[idx[b], idx[a]] = rho
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+class Copula:
+    """
+    Gaussian copula over devices.  The correlation matrix is factorised once
+    (Cholesky; clipped to the nearest valid correlation matrix if needed)
+    and the factor is reused for every batch of draws.
+    """
+
+    def __init__(self, corr):
+        corr = np.asarray(corr, dtype=np.float64)
+        try:
+            self.L = np.linalg.cholesky(corr)
+        except np.linalg.LinAlgError:
+            w, v = np.linalg.eigh((corr + corr.T) / 2)
+            c = (v * np.maximum(w, 1e-10)) @ v.T
+            d = np.sqrt(np.diag(c))
+            self.L = np.linalg.cholesky(c / d[:, None] / d[None, :])
+
+    def __len__(self):
+        return len(self.L)
+
+    def uniforms(self, N, rng, dtype=np.float64):
+        """Correlated uniforms, shape (devices, N), built CHUNK columns at a time."""
+        L = self.L.astype(dtype, copy=False)
+        u = np.empty((len(L), N), dtype=dtype)
+        for s in range(0, N, CHUNK):
+            z = rng.standard_normal((len(L), min(CHUNK, N - s)), dtype=dtype)
+            u[:, s:s+CHUNK] = ndtr(L @ z)
+        return u
+
+
+# ── 4. Monte-Carlo ±10 % ───────────────────────────────────────────
+def _triangular_rows(rng, lo, mode, hi, N):
+    """
+    block(s, e) → columns s:e of the (devices, N) triangular draw that
+    rng.triangular(lo, mode, hi, size=(devices, N)) would make, device by
+    device.  Each row slice is drawn from its own position in the stream
+    (PCG64.advance: one 64-bit output per draw); `rng` ends where the full
+    draw would leave it.  Other bit generators draw the block up front.
+    """
+    if type(rng.bit_generator) is not np.random.PCG64:
+        full = rng.triangular(lo, mode, hi, size=(len(lo), N))
+        return lambda s, e: full[:, s:e]
+    state = rng.bit_generator.state
+
+    def at(skip):
+        bg = np.random.PCG64()
+        bg.state = state
+        bg.advance(skip)
+        return bg
+
+    def block(s, e):
+        out = np.empty((len(lo), e - s))
+        for i in range(len(lo)):
+            out[i] = np.random.Generator(at(i * N + s)).triangular(
+                lo[i, 0], mode[i, 0], hi[i, 0], e - s)
+        return out
+
+    end = at(len(lo) * N).state
+    end["has_uint32"], end["uinteger"] = state["has_uint32"], state["uinteger"]
+    rng.bit_generator.state = end
+    return block
+
+
+def sample_kwh(df, N=10_000, seed=42, band=0.1, compact=False, u=None,
+               days=365, copula=None, progress=None):
+    """
+    Household kWh samples, shape (devices, N).
+
+    Pmid is drawn from a triangular (1-band, 1, 1+band) × Pmid distribution;
+    the default draw order matches the per-device loop in the category
+    scripts.  band=None takes per-device limits from df's Pmin / Pmax
+    columns instead (e.g. from ingest.apply_to_registry).  compact=True
+    draws float32 uniforms and returns float32 kWh (half the memory); `u`
+    supplies those uniforms explicitly, and `copula` (a Copula) draws them
+    jointly across devices.  The block is filled CHUNK samples at a time
+    with the same draws as one big block; `progress` (a progress.Progress)
+    gets each chunk's national totals.
+    """
+    dtype = np.float32 if compact else np.float64
+    Pmid = df["Pmid"].to_numpy(dtype)[:, None]
+    T    = df["T_active"].to_numpy(dtype)[:, None]
+    Ps   = df["P_standby"].to_numpy(dtype)[:, None]
+    Ts   = 1440 - T
+    if band is None:
+        lo = df["Pmin"].to_numpy(dtype)[:, None]
+        hi = df["Pmax"].to_numpy(dtype)[:, None]
+    else:
+        lo, hi = Pmid*dtype(1-band), Pmid*dtype(1+band)
+
+    rng = np.random.default_rng(seed)
+    N = N if u is None else u.shape[1]
+    if copula is not None and u is None:
+        def draw(s, e):
+            return triangular_ppf(copula.uniforms(e - s, rng, dtype), lo, Pmid, hi)
+    elif compact or u is not None:
+        if u is None:
+            u = rng.random((len(df), N), dtype=np.float32)
+        def draw(s, e):
+            return triangular_ppf(u[:, s:e].astype(dtype, copy=False), lo, Pmid, hi)
+    else:
+        draw = _triangular_rows(rng, lo, Pmid, hi, N)
+
+    # same formula as model.kernel, folded so each block sees one
+    # multiply-add
+    k = annual_factor(np.asarray(days, dtype)[..., None] if np.ndim(days)
+                      else days)
+    a, sb = T * k, Ps * Ts * k
+    units = df["Units_mil"].to_numpy(float)
+    out = np.empty((len(df), N), dtype)
+    for s in range(0, N, CHUNK):
+        e = min(s + CHUNK, N)
+        P = out[:, s:e]
+        P[...] = draw(s, e)
+        P *= a
+        P += sb
+        if progress is not None:
+            progress.update(e - s, totals=national(P, units))
+    return out
+
+
+def spec_kwh(draws, days=365):
+    """Household kWh from distributions.sample() draws, via model.energy."""
+    days = np.asarray(days, float)[..., None] if np.ndim(days) else days
+    return np.add(*energy(draws["Pmid"], draws["T_active"], draws["P_standby"],
+                          days))
+
+
+def national(mc, units):
+    """Per-sample national GWh, accumulated in float64 whatever mc's dtype."""
+    units = np.asarray(units, dtype=np.float64)
+    if mc.dtype == np.float64:
+        return units @ mc
+    out = np.empty(mc.shape[1])
+    for s in range(0, mc.shape[1], CHUNK):
+        out[s:s+CHUNK] = units @ mc[:, s:s+CHUNK].astype(np.float64)
+    return out
+
+
+def run(df, N=10_000, seed=42, band=0.1, carbon=CARBON, q=(5, 50, 95),
+        compact=False, copula=None, spec=None, progress=None):
+    """
+    Monte Carlo summary: per-device and national percentiles.
+
+    `spec` (see distributions.py) samples any of the four inputs instead of
+    the ±band Pmid triangle.  Samples are drawn CHUNK at a time, and
+    `progress` (a progress.Progress) gets each chunk's national totals.
+    """
+    if spec is None:
+        mc = sample_kwh(df, N, seed, band, compact, copula=copula,
+                        progress=progress)
+        total_nat = national(mc, df["Units_mil"].to_numpy(float))
+    else:
+        rng = np.random.default_rng(seed)
+        mc, total_nat = np.empty((len(df), N)), np.empty(N)
+        for s in range(0, N, CHUNK):
+            e = min(s + CHUNK, N)
+            draws = distributions.sample(df, spec, e - s, rng=rng)
+            mc[:, s:e] = spec_kwh(draws)
+            U = np.broadcast_to(draws["Units_mil"], (len(df), e - s))
+            total_nat[s:e] = np.einsum("dn,dn->n", U, mc[:, s:e])
+            if progress is not None:
+                progress.update(e - s, totals=total_nat[s:e])
+
+    dev_q = np.percentile(mc, q, axis=1)
+    nat_q = np.percentile(total_nat, q)
+    return {
+        "N": N,
+        "seed": seed,
+        "compact": compact,
+        "devices": {
+            dev: {f"P{p}": float(v) for p, v in zip(q, dev_q[:, i])}
+            for i, dev in enumerate(df["Device"])
+        },
+        "GWh_nat": {f"P{p}": float(v) for p, v in zip(q, nat_q)},
+        "kt_nat":  {f"P{p}": float(v * carbon) for p, v in zip(q, nat_q)},
+        "GWh_nat_mean": float(total_nat.mean()),
+    }
+
+
+# ── Streamed summaries ───────────────────────────────────────────────
+def mc_bounds(df, band):
+    """Smallest and largest possible national GWh under the ±band triangle."""
+    lo = df.assign(Pmid=df["Pmid"] * (1 - band))
+    hi = df.assign(Pmid=df["Pmid"] * (1 + band))
+    return tuple(float(compute(d)["GWh_nat"].sum()) for d in (lo, hi))
+
+
+def hist_summary(parts, bounds, q=(5, 50, 95)):
+    """
+    Mean, sd, min/max and percentiles of national GWh from partial sums:
+    parts are dicts of n, sum, sumsq, min, max and a BINS histogram over
+    `bounds`.  Percentiles interpolate the histogram's CDF, so they are
+    exact to within one bin width.
+    """
+    n = sum(p["n"] for p in parts)
+    s = sum(p["sum"] for p in parts)
+    ss = sum(p["sumsq"] for p in parts)
+    hist = np.sum([p["hist"] for p in parts], axis=0)
+    edges = np.linspace(*bounds, BINS + 1)
+    cdf = np.concatenate([[0], np.cumsum(hist)]) / n
+    return {"N": n, "mean": s / n, "sd": float(np.sqrt(max(ss / n - (s / n)**2, 0))),
+            "min": min(p["min"] for p in parts), "max": max(p["max"] for p in parts),
+            "GWh_nat": {f"P{p}": float(np.interp(p / 100, cdf, edges)) for p in q},
+            "hist": hist, "edges": edges}
+
+
+def precision_report(df, N=100_000, seed=42, band=0.1, q=(5, 50, 95),
+                     rtol=COMPACT_RTOL):
+    """
+    Compare compact mode with a float64 run on the same uniforms.
+
+    Returns the worst relative error on per-sample national totals, on the
+    mean total and on each national percentile, and whether all are < rtol.
+    """
+    u = np.random.default_rng(seed).random((len(df), N), dtype=np.float32)
+    units = df["Units_mil"].to_numpy(float)
+    ref = national(sample_kwh(df, band=band, u=u.astype(np.float64)), units)
+    cmp = national(sample_kwh(df, band=band, compact=True, u=u), units)
+
+    def rel(a, b):
+        return float(np.max(np.abs(a - b) / np.abs(b)))
+
+    report = {
+        "N": N,
+        "sample_max_rel": rel(cmp, ref),
+        "mean_rel": rel(cmp.mean(), ref.mean()),
+        **{f"P{p}_rel": rel(np.percentile(cmp, p), np.percentile(ref, p))
+           for p in q},
+        "rtol": rtol,
+    }
+    report["ok"] = all(v < rtol for k, v in report.items() if k.endswith("_rel"))
+    return report
+
+
+
+# ── Variance-reduced tail estimation ─────────────────────────────────
+METHODS = ("plain", "antithetic", "control", "importance")
+
+
+def weighted_percentile(x, q, w=None, ratio=False):
+    """
+    Percentiles of x under sample weights w.  ratio=True treats w as
+    likelihood ratios with mean one and inverts the upper-tail estimate
+    Σ w·1{x > y} / n directly, which stays unbiased where self-normalised
+    weights do not.
+    """
+    if w is None:
+        return np.percentile(x, q)
+    if ratio:
+        o = np.argsort(x)[::-1]
+        tail = np.cumsum(w[o]) / len(x)
+        i = np.searchsorted(tail, 1 - np.asarray(q, float) / 100)
+        return x[o][np.minimum(i, len(x) - 1)]
+    o = np.argsort(x)
+    cw = np.cumsum(w[o])
+    i = np.searchsorted(cw / cw[-1], np.asarray(q, float) / 100)
+    return x[o][np.minimum(i, len(x) - 1)]
+
+
+def control_percentile(x, c, q):
+    """
+    Percentiles of x from the control-variate CDF: at each order statistic
+    t, the empirical F(t) minus β_t · mean(c), with β_t the regression of
+    1{x ≤ t} on c (known mean zero).  The corrected CDF is made monotone
+    and inverted.
+    """
+    o = np.argsort(x)
+    n = len(x)
+    dc = c - c.mean()
+    F = np.arange(1, n + 1) / n
+    beta = np.cumsum(dc[o]) / n / (dc @ dc / n) if dc @ dc > 0 else np.zeros(n)
+    F = np.clip(np.maximum.accumulate(F - beta * c.mean()), 0, 1)
+    i = np.searchsorted(F, np.asarray(q, float) / 100)
+    return x[o][np.minimum(i, n - 1)]
+
+
+def _limits(df, band):
+    Pmid = df["Pmid"].to_numpy(float)
+    if band is None:
+        return df["Pmin"].to_numpy(float), Pmid, df["Pmax"].to_numpy(float)
+    return Pmid * (1 - band), Pmid, Pmid * (1 + band)
+
+
+def _band_spec(df, band):
+    """The ±band (or Pmin / Pmax) Pmid triangle as a distributions spec."""
+    if band is not None:
+        return {"defaults": {"Pmid": {"dist": "triangular",
+                                      "low": 1 - band, "high": 1 + band}}}
+    lo, m, hi = _limits(df, band)
+    return {"devices": {d: {"Pmid": {"dist": "triangular", "relative": False,
+                                     "low": a, "mode": b, "high": c}}
+                        for d, a, b, c in zip(df["Device"], lo, m, hi)}}
+
+
+def tail_shift(df, band=0.1, q=99):
+    """
+    Mean shift of the standard-normal scores behind the uniforms for
+    importance sampling: along each device's share of the national spread,
+    long enough to centre the draws on the q-th percentile.  One effective
+    direction keeps the likelihood ratios well behaved with many devices.
+    """
+    lo, m, hi = _limits(df, band)
+    slope = (df["Units_mil"].to_numpy(float) * df["T_active"].to_numpy(float)
+             * annual_factor())                            # ∂GWh_nat/∂P
+    sd = slope * np.sqrt((lo**2 + m**2 + hi**2 - lo*m - lo*hi - m*hi) / 18)
+    return ndtri(q / 100) * sd / np.sqrt(sd @ sd)
+
+
+def _draw_totals(df, N, rng, band, method, spec, tilt, progress=None):
+    """
+    National GWh per sample, the estimator's samples y and weights w.
+    Draws are made CHUNK samples at a time; `progress` gets each chunk's
+    totals.
+    """
+    units = df["Units_mil"].to_numpy(float)
+    total = np.empty(N)
+
+    def chunks(n):
+        for s in range(0, n, CHUNK):
+            yield s, min(s + CHUNK, n)
+
+    def report(*t):
+        if progress is not None:
+            progress.update(sum(map(len, t)), totals=np.concatenate(t))
+
+    if method == "antithetic":
+        h = N // 2
+        for s, e in chunks(h):
+            u = rng.random((len(df), e - s))
+            total[s:e] = national(sample_kwh(df, band=band, u=u), units)
+            total[h+s:h+e] = national(sample_kwh(df, band=band, u=1 - u), units)
+            report(total[s:e], total[h+s:h+e])
+        return total, (total[:h] + total[h:]) / 2, None, {}
+    if method == "importance":
+        mu = tail_shift(df, band, tilt) if np.ndim(tilt) == 0 else np.asarray(tilt, float)
+        logw = np.empty(N)
+        for s, e in chunks(N):
+            z = rng.standard_normal((len(df), e - s)) + mu[:, None]
+            total[s:e] = national(sample_kwh(df, band=band, u=ndtr(z)), units)
+            logw[s:e] = mu @ mu / 2 - mu @ z                     # φ(z) / φ(z - μ)
+            if progress is not None:        # shifted draws: count them only
+                progress.update(e - s)
+        return total, total, np.exp(logw), {"shift": mu}
+
+    # control: C = Σ ∂E/∂p · (x - x_mid), the mid-case linearisation of
+    # GWh_nat minus its constant; E[C] follows from the analytic input means
+    spec = spec or _band_spec(df, band)
+    x0 = [df[p].to_numpy(float) for p in PARAMS]
+    g = gradient(*x0)
+    c = np.empty(N)
+    for s, e in chunks(N):
+        draws = distributions.sample(df, spec, e - s, rng=rng)
+        U = np.broadcast_to(draws["Units_mil"], (len(df), e - s))
+        total[s:e] = np.einsum("dn,dn->n", U, spec_kwh(draws))
+        if method == "control":
+            c[s:e] = sum(g[:, j] @ (draws[p] - x0[j][:, None])
+                         for j, p in enumerate(PARAMS))
+        report(total[s:e])
+    if method == "plain":
+        return total, total, None, {}
+
+    mu = distributions.means(df, spec)
+    c -= sum(g[:, j] @ (mu[p] - x0[j]) for j, p in enumerate(PARAMS))
+    dc = c - c.mean()
+    beta = dc @ (total - total.mean()) / (dc @ dc) if dc @ dc > 0 else 0.0
+    return total, total - beta * c, None, {"beta": float(beta), "control": c}
+
+
+def tail(df, q=(95, 99, 99.9), N=10_000, seed=42, band=0.1, method="plain",
+         spec=None, tilt=None, batches=20, carbon=CARBON, progress=None):
+    """
+    National GWh percentiles with a variance-reduction option.
+
+    plain       independent draws
+    antithetic  N/2 uniforms and their mirrors 1-u (N must be even)
+    control     the mid-case linearisation of GWh_nat as a control variate
+                with known mean, for the mean and, through the regression
+                of 1{total ≤ t} on it, for the CDF the percentiles invert
+                (control_percentile)
+    importance  normal scores shifted towards the upper tail (see
+                tail_shift) and reweighted by the likelihood ratio; `tilt`
+                is the target percentile (default max(q)) or the shift
+                vector itself
+
+    Returns the percentiles with batch-means standard errors, the mean with
+    its standard error and effective sample sizes: ESS for the mean (Kish's
+    (Σw)²/Σw² under importance weights) and ESS_tail, the plain draws that
+    would match each percentile's exceedance variance.  ESS is inf when the
+    mean estimator has no variance left, as for antithetic and control on
+    this model (energy is linear in Pmid), so check np.isfinite before
+    rounding it.  `spec` applies to
+    plain and control only; the other two drive the ±band engine through
+    its uniforms.  `progress` (a progress.Progress) gets the national
+    totals of each CHUNK of draws as they are made (importance: the count
+    only, as its draws follow the shifted distribution).
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method: {method!r}")
+    if spec is not None and method in ("antithetic", "importance"):
+        raise ValueError(f"{method} sampling needs the ±band engine, not a spec")
+    if method == "antithetic" and N % 2:
+        raise ValueError(f"antithetic sampling needs an even N, got {N}")
+    total, y, w, extra = _draw_totals(df, N, np.random.default_rng(seed), band,
+                                      method, spec, max(q) if tilt is None else tilt,
+                                      progress)
+    c = extra.pop("control", None)
+
+    def percentiles(t, wt):
+        if c is not None:
+            return control_percentile(total[t], c[t], q)
+        return weighted_percentile(total[t], q, wt, ratio=True)
+
+    # batches of whole samples (antithetic: whole pairs)
+    per, means = [], []
+    for b in np.array_split(np.arange(len(y)), batches):
+        t = np.concatenate([b, b + N // 2]) if method == "antithetic" else b
+        wb = None if w is None else w[t]
+        per.append(percentiles(t, wb))
+        means.append(y[b].mean() if w is None else w[b] @ y[b] / len(b))
+
+    est = percentiles(slice(None), w)
+    se = np.std(per, axis=0, ddof=1) / np.sqrt(batches)
+    if w is None:
+        mean, var_mean = y.mean(), y.var(ddof=1) / len(y)
+        # symmetric inputs make antithetic pair means constant
+        ess = (total.var(ddof=1) / var_mean
+               if var_mean > 1e-12 * total.var() / len(y) else np.inf)
+    else:
+        mean, var_mean = w @ y / len(y), np.var(means, ddof=1) / batches
+        ess = w.sum()**2 / (w @ w)
+    # per percentile: plain draws giving the same variance of the
+    # exceedance estimate, p(1-p) / Var[mean of w·1{total > estimate}]
+    # (for control, of the residual after regressing on the control)
+    ess_q = {}
+    for p, v in zip(q, est):
+        h = (total > v) * (1.0 if w is None else w)
+        if c is not None:
+            dc = c - c.mean()
+            h = h - (dc @ (h - h.mean()) / (dc @ dc) if dc @ dc > 0 else 0.0) * c
+        if method == "antithetic":
+            h = (h[:N // 2] + h[N // 2:]) / 2
+        var_h = h.var(ddof=1) / len(h)
+        ess_q[f"P{p}"] = float(p / 100 * (1 - p / 100) / var_h) if var_h > 0 else np.inf
+    return {
+        "method": method,
+        "N": N,
+        "ESS": float(ess),
+        "ESS_tail": ess_q,
+        "mean": float(mean),
+        "mean_se": float(np.sqrt(var_mean)),
+        "GWh_nat": {f"P{p}": float(v) for p, v in zip(q, est)},
+        "GWh_nat_se": {f"P{p}": float(v) for p, v in zip(q, se)},
+        "kt_nat": {f"P{p}": float(v * carbon) for p, v in zip(q, est)},
+        **extra,
+    }
@@ -0,0 +1,434 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.patches import Circle, FancyBboxPatch
+
+# Every helper draws on `ax` when one is given (dashboards, reports) and
+# otherwise opens its own figure and shows it, as the scripts always did.
+
+def _axes(ax, figsize):
+    if ax is None:
+        fig, ax = plt.subplots(figsize=figsize)
+        return fig, ax, True
+    return ax.figure, ax, False
+
+def _finish(fig, standalone):
+    if standalone:
+        fig.tight_layout()
+        plt.show()
+
+
+# ======== SCALABLE BAR HELPERS ====================================
+# Large registries are cut to the top-N rows plus an "Others" row (per
+# category with by="Category") before anything is drawn.  Bars and error
+# bars are single collections rather than one artist per row.
+
+def top_n_others(d, key, n=26, sum_cols=(), by=None, label="Others"):
+    """
+    The n largest rows by `key` plus the rest of `sum_cols` summed into an
+    "Others" row.  With `by` (e.g. "Category") the remainder gets one
+    "Others (group)" row per group and rows are ordered in group blocks,
+    largest group first, so the output never exceeds n + groups rows.
+    """
+    sum_cols = list(dict.fromkeys([key, *sum_cols]))
+    d = d.sort_values(key, ascending=False, kind="stable")
+    if not n or len(d) <= n:
+        top, rest = d, d.iloc[:0]
+    else:
+        top, rest = d.iloc[:n], d.iloc[n:]
+    if by is None:
+        if not len(rest):
+            return d
+        row = rest[sum_cols].sum().to_frame().T.assign(Device=label)
+        return pd.concat([top, row], ignore_index=True)
+    others = rest.groupby(by, sort=False)[sum_cols].sum().reset_index()
+    others["Device"] = label + " (" + others[by].astype(str) + ")"
+    out = pd.concat([top.assign(_o=0), others.assign(_o=1)], ignore_index=True)
+    rank = out.groupby(by)[key].transform("sum").rank(method="dense",
+                                                      ascending=False)
+    return (out.assign(_g=rank)
+               .sort_values(["_g", "_o", key], ascending=[True, True, False],
+                            kind="stable")
+               .drop(columns=["_g", "_o"]).reset_index(drop=True))
+
+
+def _bars(ax, bottom, height, color, label=None, width=0.8):
+    """One PolyCollection of bars at x = 0..n-1."""
+    from matplotlib.collections import PolyCollection
+    x = np.arange(len(height))[:, None] + np.array([-1, -1, 1, 1]) * width / 2
+    y0 = np.asarray(bottom, float)[:, None]
+    y = y0 + np.asarray(height, float)[:, None] * np.array([0, 1, 1, 0])
+    coll = PolyCollection(np.stack([x, y], axis=2), facecolors=color,
+                          edgecolors="none", label=label)
+    ax.add_collection(coll)
+    return coll
+
+
+def _errorbars(ax, y, lower, upper, label=None, cap=0.15):
+    """Vertical error bars with caps as one LineCollection."""
+    from matplotlib.collections import LineCollection
+    x = np.arange(len(y), dtype=float)
+    lo, hi = np.asarray(y) - np.asarray(lower), np.asarray(y) + np.asarray(upper)
+    stems = np.stack([np.c_[x, lo], np.c_[x, hi]], axis=1)
+    caps = np.concatenate([np.stack([np.c_[x - cap, v], np.c_[x + cap, v]], axis=1)
+                           for v in (lo, hi)])
+    coll = LineCollection(np.concatenate([stems, caps]), colors="k",
+                          linewidths=1, label=label)
+    ax.add_collection(coll)
+    return coll
+
+
+def _labels(ax, y, text, max_labels=60, value=None, **kw):
+    """
+    Value labels above bars.  Past max_labels only the largest bars (by
+    `value`, default y) are labelled, and the figure says so.
+    """
+    idx = np.arange(len(y))
+    if len(y) > max_labels:
+        v = np.asarray(y if value is None else value, float)
+        idx = np.sort(np.argpartition(-v, max_labels - 1)[:max_labels])
+        ax.text(1, 1.01, f"values shown for the {max_labels} largest of "
+                f"{len(y):,} bars", transform=ax.transAxes, ha="right",
+                va="bottom", fontsize=8, color="grey")
+    for i in idx:
+        ax.text(i, y[i], text[i], **kw)
+
+
+def _device_axis(ax, d, by=None, fontsize=None):
+    n = len(d)
+    ax.set_xlim(-0.5, n - 0.5)
+    ax.set_xticks(range(n))
+    ax.set_xticklabels(d.Device, rotation=45, ha="right", fontsize=fontsize)
+    if by is not None and n:
+        cats = d[by].to_numpy()
+        for j in np.flatnonzero(cats[1:] != cats[:-1]):
+            ax.axvline(j + 0.5, color='grey', lw=0.8, ls=':')
+
+
+# ======== STACKED BAR PLOT FUNCTION ===============================
+def _stacked_range(ax, active, standby, lo, hi, colors, err_label=None):
+    """Active + stand-by bars and the active-range error bars."""
+    total = active + standby
+    err_lo, err_hi = active - lo, hi - active
+    _bars(ax, np.zeros(len(active)), active, colors[0], "Active")
+    _bars(ax, active, standby, colors[1], "Stand-by")
+    _errorbars(ax, total, err_lo, err_hi, label=err_label)
+    return total, err_lo, err_hi
+
+
+def plot_stacked_energy(df, title, ylabel, nat=False, top_n=26, ax=None, by=None):
+    """
+    Stacked bars with error bars; labels clear error tops.  Rows beyond
+    top_n (per category with by="Category") are summed into "Others".
+    """
+    pre = "GWh_nat" if nat else "kWh_hh"
+    cols = [f"{pre}_active", f"{pre}_standby", f"{pre}_active_min",
+            f"{pre}_active_max"]
+    d = top_n_others(df, pre, top_n, cols, by)
+    active, standby, a_min, a_max = (d[c].to_numpy(float) for c in cols)
+
+    fig, ax, standalone = _axes(ax, (14, 8))
+    total, _, y_err_upper = _stacked_range(
+        ax, active, standby, a_min, a_max, ("#1f77b4", "#aec6cf"),
+        "±10 % Active Power")
+
+    # ▲ pad y-axis 10 % above tallest error bar
+    total_plus_err = total + y_err_upper
+    ax.set_ylim(0, total_plus_err.max()*1.10)
+
+    # ▲ label above error-bar tip + 2 % padding
+    _labels(ax, total_plus_err + total_plus_err.max()*0.02,
+            [f"{t:,.0f}" if nat else f"{t:,.1f}" for t in total], value=total,
+            ha="center", va="bottom", fontsize=9, zorder=3, clip_on=False)
+
+    ax.set_title(title, fontsize=14)
+    ax.set_ylabel(ylabel, fontsize=12)
+    _device_axis(ax, d, by, fontsize=10)
+    ax.legend(loc="upper right")
+    _finish(fig, standalone)
+    return ax
+
+# ======== STACKED EMISSIONS PLOT FUNCTION =========================
+def plot_stacked_emissions(df, title, ylabel, top_n=26, ax=None, by=None):
+    """Stacked emissions bars with error bars and clear labels."""
+    cols = ["kt_nat_active", "kt_nat_standby", "kt_nat_active_min",
+            "kt_nat_active_max"]
+    d = top_n_others(df, "kt_nat", top_n, cols, by)
+    active, standby, a_min, a_max = (d[c].to_numpy(float) for c in cols)
+
+    fig, ax, standalone = _axes(ax, (14, 8))
+    total, _, y_err_upper = _stacked_range(
+        ax, active, standby, a_min, a_max,
+        ("#d62728", "#f7a4a4"),                 # brick red, light red
+        "±10 % Active Power")
+
+    # Adjust y-axis limits
+    total_plus_err = total + y_err_upper
+    ax.set_ylim(0, total_plus_err.max() * 1.10)
+
+    # Add labels above error bars
+    _labels(ax, total_plus_err + total_plus_err.max()*0.02,
+            [f"{t:,.0f}" for t in total], value=total,
+            ha="center", va="bottom", fontsize=9, zorder=3, clip_on=False)
+
+    ax.set_title(title, fontsize=14)
+    ax.set_ylabel(ylabel, fontsize=12)
+    _device_axis(ax, d, by, fontsize=10)
+    ax.legend(loc="upper right")
+    _finish(fig, standalone)
+    return ax
+
+# ----------  donut helper ---------------------------------
+def donut_chart(series, title, label_fmt, ax=None):
+    """
+    series     : pd.Series   (index = labels, values = numbers)
+    title      : str         chart title
+    label_fmt  : fn(label, value, pct) -> str  text for legend
+    """
+    total = series.sum()
+    pct   = series / total * 100
+    legend_labels = [label_fmt(lbl, val, p) for lbl, val, p
+                     in zip(series.index, series.values, pct)]
+
+    fig, ax, standalone = _axes(ax, (6, 6))
+    wedges = ax.pie(series.values, startangle=90)[0]
+
+    # donut hole
+    ax.add_artist(Circle((0, 0), 0.45, fc="white"))
+    ax.axis("equal")
+    ax.set_title(title, pad=20, fontsize=14)
+
+    ax.legend(wedges, legend_labels,
+              loc="center left", bbox_to_anchor=(1.0, 0.5),
+              fontsize=10, frameon=False)
+    _finish(fig, standalone)
+    return ax
+
+# ---------- DEVICE-LEVEL DONUT DATA  --------------
+def device_shares(df, col="GWh_nat", keep=4):
+    """
+    {category: Series of `col` by device} with the tail grouped into
+    "Others" when a category has more than keep+1 devices.
+    One sort and one groupby for all categories.
+    """
+    d = df.sort_values(col, ascending=False)
+    shares = {}
+    for cat, g in d.groupby("Category", sort=False):
+        s = g.set_index("Device")[col]
+        if len(s) > keep + 1:
+            s = pd.concat([s.iloc[:keep],
+                           pd.Series({"Others": s.iloc[keep:].sum()})])
+        shares[cat] = s
+    return {cat: shares[cat] for cat in df["Category"].unique()}
+
+# --- helper: KPI rectangle --------------------------------------------------
+def kpi_card(title, number, unit, fill, ax=None):
+    """Draw a rounded-rectangle KPI card filled with `fill` colour."""
+    fig, ax, standalone = _axes(ax, (5, 2.7))
+    ax.axis("off")
+
+    # full-axes rounded rectangle
+    rect = FancyBboxPatch(
+        (0, 0), 1, 1,
+        boxstyle="round,pad=0.02,rounding_size=0.05",
+        transform=ax.transAxes,
+        linewidth=0,
+        facecolor=fill,
+        zorder=0
+    )
+    ax.add_patch(rect)
+
+    ax.text(0.5, 0.65, f"{number:,.0f}",
+            ha="center", va="center",
+            fontsize=36, fontweight="bold", color="#000000",
+            transform=ax.transAxes)
+
+    ax.text(0.5, 0.28, unit,
+            ha="center", va="center",
+            fontsize=13, color="#000000",
+            transform=ax.transAxes)
+
+    if standalone:
+        fig.suptitle(title, y=0.98, fontsize=15, color="#000000")
+    else:
+        ax.set_title(title, fontsize=15, color="#000000")
+    _finish(fig, standalone)
+    return ax
+
+# --- bar-plot helper ------------------------------------------------
+def barplot(df, value_col, pct_col, title, xlabel, color="#1f77b4", ax=None):
+    fig, ax, standalone = _axes(ax, (14, 8))
+
+    ylabels = df["Device"] + " (" + df["Parameter"] + ")"
+    bars    = ax.barh(ylabels, df[value_col], color=color)
+
+    ax.invert_yaxis()
+    ax.set_xlabel(xlabel)
+    ax.set_title(title, fontsize=14, pad=12)
+    ax.grid(axis="x", alpha=0.3)
+
+    # pad axis so labels fit
+    x_max = df[value_col].max()
+    ax.set_xlim(0, x_max * 1.15)        # 15 % head-room
+
+    for bar, pct in zip(bars, df[pct_col]):
+        w = bar.get_width()
+        ax.text(w + x_max*0.02,                 # 2 % inside the padded area
+                bar.get_y() + bar.get_height()/2,
+                f"{w:,.0f}  ({pct:.2f} %)",
+                ha="left", va="center", fontsize=9)
+
+    _finish(fig, standalone)
+    return ax
+
+
+# ======== CATEGORY SCRIPT CHARTS ==================================
+def stacked(d, ttl, yl, nat=False, ax=None, figsize=(12, 6), top_n=26, by=None):
+    key = "GWh_nat" if nat else "kWh_hh"
+    scale = d.Units_mil if nat else 1
+    d = d.assign(active=d.kWh_hh_active_mid*scale, stand=d.kWh_hh_standby*scale,
+                 active_low=d.kWh_hh_active_min*scale,
+                 active_high=d.kWh_hh_active_max*scale)
+    d = top_n_others(d, key, top_n,
+                     ["active", "stand", "active_low", "active_high"], by)
+    active, stand, low, high = (d[c].to_numpy(float) for c in
+                                ("active", "stand", "active_low", "active_high"))
+    fig, ax, standalone = _axes(ax, figsize)
+    tot, y_err_lower, y_err_upper = _stacked_range(
+        ax, active, stand, low, high, ("#1f77b4", "#aec6cf"))
+
+    # Calculate label position above error bars
+    max_error = max(y_err_upper.max(), y_err_lower.max())
+    label_height = tot + y_err_upper + max_error * 0.15
+    ax.set_ylim(0, label_height.max() * 1.05)
+
+    # Add value labels above error bars
+    _labels(ax, label_height,
+            [f'{v:,.0f}' if nat else f'{v:,.1f}' for v in tot], value=tot,
+            ha='center', va='bottom', fontsize=9)
+
+    ax.set(title=ttl,ylabel=yl)
+    _device_axis(ax, d, by)
+    ax.legend(); _finish(fig, standalone)
+    return ax
+
+def carbon(d,col,ttl,yl,color,nat=False, ax=None, figsize=(12, 6), top_n=26, by=None):
+    d2 = top_n_others(d, col, top_n, by=by)
+    h = d2[col].to_numpy(float)
+    fig, ax, standalone = _axes(ax, figsize)
+    _bars(ax, np.zeros(len(h)), h, color)
+    ax.set_ylim(0, h.max() * 1.08)
+    # Format based on magnitude
+    _labels(ax, h*1.01, [f'{v:,.0f}' if v > 10 else f'{v:,.1f}' for v in h],
+            ha='center', va='bottom', fontsize=9)
+    ax.set(title=ttl,ylabel=yl)
+    _device_axis(ax, d2, by)
+    _finish(fig, standalone)
+    return ax
+
+# ── ECUK validation chart ──────────────────────────────────────────
+def validation_chart(val, title, ax=None, figsize=(12, 7)):
+    """
+    val : DataFrame with Device, GWh_nat, ECUK and Δ (%) columns
+    """
+    fig, ax, standalone = _axes(ax, figsize)
+    x = np.arange(len(val))
+    w = 0.35
+    bars_model = ax.bar(x - w/2, val.GWh_nat, w, label="Model", color="#1f77b4")
+    bars_ecuk = ax.bar(x + w/2, val.ECUK, w, label="ECUK", color="#ff7f0e")
+
+    # Add value labels on top of bars
+    for bar in bars_model:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{height:,.0f}', ha='center', va='bottom', fontsize=9)
+
+    for bar in bars_ecuk:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{height:,.0f}', ha='center', va='bottom', fontsize=9)
+
+    # Calculate maximum bar height for positioning
+    max_bar = max(val.GWh_nat.max(), val.ECUK.max())
+    top_margin = max_bar * 0.25  # 25% headroom
+
+    # Add percentage difference labels with adjusted position
+    for j in range(len(val)):
+        row = val.iloc[j]
+        m, e, d = row.GWh_nat, row.ECUK, row.Δ
+        col = 'green' if abs(d) < 10 else 'orange' if abs(d) < 25 else 'red'
+
+        # Position above both bars with padding
+        y_pos = max(m, e) + (top_margin * 0.15)
+        ax.text(j, y_pos, f'{d:+.0f}%',
+                ha='center', bbox=dict(facecolor=col, alpha=0.8, pad=0.3))
+
+    # Set y-axis limits with headroom
+    ax.set_ylim(0, max_bar + top_margin)
+
+    ax.set_ylabel("National electricity (GWh / yr)")
+    ax.set_title(title)
+    ax.set_xticks(x)
+    ax.set_xticklabels(val.Device, rotation=45, ha="right")
+    ax.legend()
+    _finish(fig, standalone)
+    return ax
+
+def validation_interval_chart(val, title, ax=None, figsize=(14, 7)):
+    """
+    val : DataFrame with Device, Category, P5, P50, P95 (GWh), ECUK and
+          p_bracket, as from validation.mc_validation
+    Model P5–P95 intervals against the ECUK value, coloured by how central
+    ECUK sits in the model distribution rather than by fixed |Δ| bands.
+    """
+    fig, ax, standalone = _axes(ax, figsize)
+    x = np.arange(len(val))
+    col = np.where(val.p_bracket >= 0.32, 'green',
+                   np.where(val.p_bracket >= 0.05, 'orange', 'red'))
+    ax.bar(x, val.P50, 0.6, color="#1f77b4", alpha=0.35, label="Model P50")
+    ax.errorbar(x, val.P50, yerr=[val.P50 - val.P5, val.P95 - val.P50],
+                fmt='none', ecolor='k', capsize=4, label="Model P5–P95")
+    ax.scatter(x, val.ECUK, c=col, marker='D', s=45, zorder=3, label="ECUK")
+    # category separators
+    cats = val.Category.to_numpy()
+    for j in np.flatnonzero(cats[1:] != cats[:-1]):
+        ax.axvline(j + 0.5, color='grey', lw=0.8, ls=':')
+    ax.set_yscale('log')
+    ax.set_ylabel("National electricity (GWh / yr)")
+    ax.set_title(title)
+    ax.set_xticks(x)
+    ax.set_xticklabels(val.Device, rotation=45, ha="right")
+    ax.legend()
+    _finish(fig, standalone)
+    return ax
+
+# ── Monte Carlo charts ─────────────────────────────────────────────
+def mc_histogram(total_nat, title, ax=None, figsize=(10, 6)):
+    """Histogram of national Monte Carlo totals (GWh in, TWh shown)."""
+    twh = np.asarray(total_nat) / 1000
+    fig, ax, standalone = _axes(ax, figsize)
+    ax.hist(twh, bins=50, color='skyblue', edgecolor='black', alpha=0.8)
+    ax.axvline(np.percentile(twh, 5), color='red', linestyle='--', label='5th percentile')
+    ax.axvline(np.percentile(twh, 95), color='blue', linestyle='--', label='95th percentile')
+    ax.set_title(title)
+    ax.set_xlabel('Total National Energy (TWh/year)')
+    ax.set_ylabel('Frequency')
+    ax.grid(True, alpha=0.2)
+    ax.legend()
+    _finish(fig, standalone)
+    return ax
+
+def mc_ranges(df, title, ax=None, figsize=(12, 8)):
+    """P5–P95 household kWh per device around the P50, largest first."""
+    d = df.sort_values('P50', ascending=False)
+    fig, ax, standalone = _axes(ax, figsize)
+    ax.errorbar(range(len(d)), d['P50'],
+                yerr=[d['P50'] - d['P5'], d['P95'] - d['P50']],
+                fmt='o', color='black', capsize=5)
+    ax.set_xticks(range(len(d)))
+    ax.set_xticklabels(d.Device, rotation=45, ha='right')
+    ax.set_ylabel('Household Energy (kWh/year)')
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+    _finish(fig, standalone)
+    return ax
@@ -0,0 +1,173 @@
+"""
+Stochastic household load profiles and coincident peak demand.
+
+    python profiles.py --households 1000000
+
+Simulates households one chunk at a time.  Each household owns
+Units_mil / households_mil of every device (the integer part surely, the
+fraction with that probability).  Each owned unit runs `sessions` times a
+day; in each chunk a device's sessions add up to exactly T_active minutes
+per owned unit (always-on devices run one whole-day session).  Start times follow an
+optional per-device daily shape, and durations are lognormal around
+T_active / sessions, capped at a day.  Every session is added to a circular
+minute-of-day difference array.  The chunks are summed and scaled to the
+national household count, which gives national minute-level demand per
+device, its peak, each device's contribution to the peak and the
+after-diversity maximum demand (ADMD) per household.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import model
+
+MINUTES = 1440
+HOUSEHOLDS_MIL = 28.4          # UK households (millions)
+CHUNK = 100_000                # households per chunk
+
+
+def ownership(df, households_mil=HOUSEHOLDS_MIL):
+    """Mean units of each device per household."""
+    return df["Units_mil"].to_numpy(float) / households_mil
+
+
+def _minute_weights(shape):
+    """24-, 48- or 1440-value daily shape → normalised per-minute weights."""
+    if shape is None:
+        return None
+    w = np.repeat(np.asarray(shape, float), MINUTES // len(shape))
+    return w / w.sum()
+
+
+def _durations(x, total):
+    """
+    Scale draws `x` to sum to `total` minutes with none above a day; the
+    excess of clipped sessions goes to the others in proportion.
+    """
+    dur = x * (total / x.sum())
+    over = dur > MINUTES
+    while over.any():
+        excess = (dur[over] - MINUTES).sum()
+        dur[over] = MINUTES
+        free = dur < MINUTES
+        dur[free] += excess * dur[free] / dur[free].sum()
+        over = dur > MINUTES
+    return dur
+
+
+def _device_day(rng, n_hh, own, T, P_on, P_sb, sessions, weights, sigma):
+    """
+    One device across n_hh households: net active load on a 2-day circular
+    difference grid plus the flat standby load (W).
+    """
+    whole = int(own)
+    units = whole * n_hh + int((rng.random(n_hh) < own - whole).sum())
+    diff = np.zeros(2 * MINUTES + 2)
+    if units == 0 or T <= 0:
+        return diff, units * P_sb
+
+    if T >= MINUTES:
+        sessions = 1                       # always on: one whole-day session
+    n = units * sessions
+    if weights is None:
+        start = rng.integers(0, MINUTES, n)
+    else:
+        start = np.minimum(np.searchsorted(np.cumsum(weights), rng.random(n)),
+                           MINUTES - 1)
+    if T >= MINUTES:
+        dur = np.full(n, float(MINUTES))
+    else:
+        dur = _durations(rng.lognormal(-sigma**2 / 2, sigma, n), n * T / sessions)
+    end = start + dur
+    e = np.floor(end).astype(np.int64)
+    frac = end - e
+
+    # +P from the start minute, -P after the end; the last partial minute
+    # keeps frac of P so energy is exact
+    P = P_on - P_sb
+    diff += np.bincount(start, minlength=len(diff)) * P
+    diff -= np.bincount(e, weights=1 - frac, minlength=len(diff)) * P
+    diff -= np.bincount(e + 1, weights=frac, minlength=len(diff)) * P
+    return diff, units * P_sb
+
+
+def simulate(df, households=1_000_000, households_mil=HOUSEHOLDS_MIL,
+             sessions=None, start_shapes=None, sigma=0.3, seed=42, chunk=CHUNK,
+             progress=None):
+    """
+    National minute-level demand per device (W), shape (devices, 1440).
+
+    sessions     : {device: uses per day}, default 1
+    start_shapes : {device: 24 / 48 / 1440 weights}, default uniform;
+                   the key "*" applies to every device without its own
+    progress     : optional progress.Progress, advanced per chunk of households
+    """
+    sessions = sessions or {}
+    start_shapes = start_shapes or {}
+    rng = np.random.default_rng(seed)
+    own = ownership(df, households_mil)
+    rows = list(zip(df["Device"], own, df["T_active"].to_numpy(float),
+                    df["Pmid"].to_numpy(float), df["P_standby"].to_numpy(float)))
+    weights = [_minute_weights(start_shapes.get(d, start_shapes.get("*")))
+               for d, *_ in rows]
+
+    load = np.zeros((len(df), MINUTES))
+    for s in range(0, households, chunk):
+        n_hh = min(chunk, households - s)
+        for i, (dev, o, T, P_on, P_sb) in enumerate(rows):
+            diff, flat = _device_day(rng, n_hh, o, T, P_on, P_sb,
+                                     int(sessions.get(dev, 1)), weights[i], sigma)
+            day = np.cumsum(diff)[:2 * MINUTES]
+            load[i] += day[:MINUTES] + day[MINUTES:] + flat
+        if progress is not None:
+            progress.update(n_hh)
+
+    return load * (households_mil * 1e6 / households)
+
+
+def peak_report(df, load, households_mil=HOUSEHOLDS_MIL):
+    """Peak, ADMD and per-device contribution to the coincident peak."""
+    total = load.sum(0)
+    t = int(total.argmax())
+    contrib = pd.DataFrame({
+        "Device": df["Device"].to_numpy(),
+        "Category": df["Category"].to_numpy() if "Category" in df else None,
+        "peak_GW": load[:, t] / 1e9,
+        "own_peak_GW": load.max(1) / 1e9,
+        "GWh_day": load.sum(1) / 60 / 1e9,
+    })
+    contrib["peak_%"] = 100 * contrib.peak_GW / (total[t] / 1e9)
+    return {
+        "peak_GW": total[t] / 1e9,
+        "peak_time": f"{t // 60:02d}:{t % 60:02d}",
+        "mean_GW": total.mean() / 1e9,
+        "ADMD_kW": total[t] / 1e3 / (households_mil * 1e6),
+        "devices": contrib.sort_values("peak_GW", ascending=False),
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--households", type=int, default=1_000_000)
+    ap.add_argument("--households-mil", type=float, default=HOUSEHOLDS_MIL)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--progress", choices=["terminal", "jsonl"])
+    a = ap.parse_args()
+
+    df = model.compute(model.load_registry())
+    bar = None
+    if a.progress:
+        from progress import Progress
+        bar = Progress(a.households, "households", a.progress)
+    load = simulate(df, a.households, a.households_mil, seed=a.seed,
+                    progress=bar)
+    if bar:
+        bar.close()
+    r = peak_report(df, load, a.households_mil)
+    print(f"Peak {r['peak_GW']:,.2f} GW at {r['peak_time']}  "
+          f"(mean {r['mean_GW']:,.2f} GW, ADMD {r['ADMD_kW']:.3f} kW / household)")
+    print(r["devices"].to_string(
+        index=False,
+        formatters={"peak_GW": "{:,.3f}".format, "own_peak_GW": "{:,.3f}".format,
+                    "GWh_day": "{:,.1f}".format, "peak_%": "{:.1f}%".format}))
@@ -0,0 +1,96 @@
+"""
+Progress reporting for long Monte Carlo, sweep and microsimulation loops.
+
+    p = Progress(N, "Monte Carlo", stream="jsonl", out=open("run.jsonl", "w"))
+    for block in ...:
+        p.update(len(block), totals=national_block)
+    p.close()
+
+update() only adds to counters, plus a sum and a strided copy of at most
+`keep` values when per-sample national totals are passed.  A line goes out
+at most every `interval` seconds: a \\r-refreshed terminal status, or one
+JSON object per line.  It shows samples per second, the ETA, and interim
+mean / P5 / P50 / P95 of the totals.  Percentiles come from the bounded
+copy, so reporting cost does not grow with N.  Loops take a `progress`
+argument (montecarlo.sample_kwh / run / tail, profiles.simulate,
+ranks.rank_stability, surrogate.fit, distributed.run / run_local) and do
+nothing extra when it is None.
+"""
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+
+KEEP = 20_000                  # totals kept for interim percentiles
+
+
+class Progress:
+    def __init__(self, total, label="", stream="terminal", out=None,
+                 interval=0.5, keep=KEEP, q=(5, 50, 95)):
+        if stream not in ("terminal", "jsonl"):
+            raise ValueError(f"unknown stream: {stream!r}")
+        self.total, self.label, self.stream = total, label, stream
+        self.out = out or sys.stderr
+        self.interval, self.keep, self.q = interval, keep, q
+        self.step = max(1, total // keep)
+        self.done, self.sum, self.n_totals = 0, 0.0, 0
+        self.kept = []
+        self.t0 = self.last = time.monotonic()
+        self._lock = threading.Lock()            # shard threads share one bar
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(self, n, totals=None):
+        """Record n finished samples (and optionally their national totals)."""
+        with self._lock:
+            self.done += n
+            if totals is not None:
+                totals = np.asarray(totals)
+                self.sum += float(totals.sum())
+                self.n_totals += len(totals)
+                self.kept.append(totals[::self.step].copy())
+            now = time.monotonic()
+            if now - self.last >= self.interval:
+                self.last = now
+                self._emit(now)
+
+    def state(self, now=None):
+        """Current progress as a dict (what each line reports)."""
+        now = time.monotonic() if now is None else now
+        elapsed = now - self.t0
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        s = {"label": self.label, "done": self.done, "total": self.total,
+             "elapsed_s": round(elapsed, 3), "rate_per_s": rate,
+             "eta_s": (self.total - self.done) / rate if rate else None}
+        if self.n_totals:
+            kept = np.concatenate(self.kept)
+            s["mean"] = self.sum / self.n_totals
+            s.update({f"P{p}": float(v)
+                      for p, v in zip(self.q, np.percentile(kept, self.q))})
+        return s
+
+    def _emit(self, now=None, final=False):
+        s = self.state(now)
+        if self.stream == "jsonl":
+            self.out.write(json.dumps({**s, "final": final}) + "\n")
+        else:
+            pct = 100 * s["done"] / self.total if self.total else 100
+            eta = ("--:--" if s["eta_s"] is None
+                   else time.strftime("%H:%M:%S", time.gmtime(s["eta_s"])))
+            line = (f"\r{self.label} {pct:5.1f}% {s['done']:,}/{self.total:,} "
+                    f"{s['rate_per_s']:,.0f}/s ETA {eta}")
+            if "mean" in s:
+                line += (f" | mean {s['mean']:,.1f} "
+                         + " ".join(f"P{p} {s[f'P{p}']:,.1f}" for p in self.q))
+            self.out.write(line + ("\n" if final else ""))
+        self.out.flush()
+
+    def close(self):
+        with self._lock:
+            self._emit(final=True)
@@ -0,0 +1,228 @@
+"""
+Incremental HTML report.
+
+    python report.py report/
+
+Every figure is keyed by a hash of the exact data slice its plot function
+consumes (plus its arguments and the function's source).  Figures whose key
+is unchanged reuse the cached image; only the others are redrawn.
+"""
+import hashlib
+import html
+import inspect
+import os
+import sys
+import time
+
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+from model import (CARBON, ECUK, load_registry, compute, category_totals,
+                   sensitivity, top_sensitive, validation_table)
+from plots import (plot_stacked_energy, plot_stacked_emissions, donut_chart,
+                   device_shares, kpi_card, barplot, stacked, carbon,
+                   validation_chart)
+
+# columns each plot function reads
+NAT_COLS = ["Device", "GWh_nat", "GWh_nat_active", "GWh_nat_standby",
+            "GWh_nat_active_min", "GWh_nat_active_max"]
+HH_COLS  = ["Device", "kWh_hh", "kWh_hh_active", "kWh_hh_standby",
+            "kWh_hh_active_min", "kWh_hh_active_max"]
+EMIS_COLS = ["Device", "kt_nat", "kt_nat_active", "kt_nat_standby",
+             "kt_nat_active_min", "kt_nat_active_max"]
+CAT_COLS = ["Device", "Units_mil", "kWh_hh", "GWh_nat", "kWh_hh_active_mid",
+            "kWh_hh_standby", "kWh_hh_active_min", "kWh_hh_active_max"]
+
+
+def pct_label(lbl, v, p):
+    return f"{lbl} – {p:.1f}%"
+
+def gwh_label(lbl, v, p):
+    return f"{lbl} – {v:,.0f} GWh"
+
+def kt_label(lbl, v, p):
+    return f"{lbl} – {v:,.0f} kt"
+
+
+def _fig(section, name, fn, *args, figsize=(14, 8), style=None, **kwargs):
+    return {"section": section, "name": name, "fn": fn, "args": args,
+            "kwargs": kwargs, "figsize": figsize, "style": style}
+
+
+def figures(df, sens=None, carbon_factor=CARBON):
+    """Figure specs for the full report, each holding only its data slice."""
+    if sens is None:
+        sens = sensitivity(df, carbon_factor)
+    cats = category_totals(df)
+    top, top_C = top_sensitive(sens, 10)
+    total_E = df["GWh_nat"].sum()
+
+    specs = [
+        _fig("Overview", "kpi-energy", kpi_card,
+             "UK Residential Electronics Energy", total_E, "GWh",
+             fill="#d7e8ff", figsize=(5, 2.7)),
+        _fig("Overview", "kpi-emissions", kpi_card,
+             "UK Residential Electronics Emissions", total_E * carbon_factor,
+             "kt CO₂e", fill="#ffe3e3", figsize=(5, 2.7)),
+        _fig("Overview", "energy-national", plot_stacked_energy, df[NAT_COLS],
+             "UK National Appliance Electricity Demand (2025)", "GWh/year",
+             nat=True),
+        _fig("Overview", "energy-household", plot_stacked_energy, df[HH_COLS],
+             "Household Appliance Electricity Consumption (2025)", "kWh/year"),
+        _fig("Overview", "emissions-national", plot_stacked_emissions,
+             df[EMIS_COLS], "UK National Appliance CO₂ Emissions (2025)",
+             "kt CO₂e/year"),
+        _fig("Categories", "category-energy-share", donut_chart,
+             cats["GWh_nat"], "UK Energy Consumption by Category", pct_label,
+             figsize=(6, 6)),
+        _fig("Categories", "category-emissions-share", donut_chart,
+             cats["kt_nat"], "UK CO₂ Emissions by Category", pct_label,
+             figsize=(6, 6)),
+        _fig("Categories", "category-energy", donut_chart, cats["GWh_nat"],
+             "Annual Energy Consumption by Category (GWh)", gwh_label,
+             figsize=(6, 6)),
+        _fig("Categories", "category-emissions", donut_chart, cats["kt_nat"],
+             "Annual CO₂ Emissions by Category (kt CO₂e)", kt_label,
+             figsize=(6, 6)),
+    ]
+    for cat, shares in device_shares(df).items():
+        specs.append(_fig("Categories", f"devices-{_slug(cat)}", donut_chart,
+                          shares, f"{cat} Devices", pct_label, figsize=(6, 6)))
+
+    specs += [
+        _fig("Sensitivity", "sensitivity-energy", barplot,
+             top[["Device", "Parameter", "ΔE_GWh", "ΔE_%"]], "ΔE_GWh", "ΔE_%",
+             "Top-10 Most Sensitive Parameters – Energy (±10 %)",
+             "Maximum Change (GWh)"),
+        _fig("Sensitivity", "sensitivity-co2", barplot,
+             top_C[["Device", "Parameter", "ΔC_kt", "ΔC_%"]], "ΔC_kt", "ΔC_%",
+             "Top-10 Most Sensitive Parameters – CO₂ (±10 %)",
+             "Maximum Change (kt CO₂e)"),
+    ]
+
+    for cat in df["Category"].unique():
+        d = (df.loc[df["Category"] == cat]
+               .rename(columns={"kWh_hh_active": "kWh_hh_active_mid"}))
+        d = d.assign(kgCO2_hh=d["kWh_hh"] * carbon_factor)
+        s, low = cat, cat.lower()
+        specs += [
+            _fig(s, f"{_slug(cat)}-household", stacked, d[CAT_COLS],
+                 f"Household {low} electricity", "kWh / hh·yr",
+                 figsize=(12, 6), style="ggplot"),
+            _fig(s, f"{_slug(cat)}-national", stacked, d[CAT_COLS],
+                 f"UK {low} electricity", "GWh / yr", nat=True,
+                 figsize=(12, 6), style="ggplot"),
+            _fig(s, f"{_slug(cat)}-household-co2", carbon,
+                 d[["Device", "kgCO2_hh"]], "kgCO2_hh",
+                 f"Household {low} CO₂e", "kg / hh·yr", "#d62728",
+                 figsize=(12, 6), style="ggplot"),
+            _fig(s, f"{_slug(cat)}-national-co2", carbon,
+                 d[["Device", "kt_nat"]], "kt_nat", f"UK {low} CO₂e",
+                 "kt / yr", "red", nat=True, figsize=(12, 6), style="ggplot"),
+        ]
+        if cat in ECUK:
+            val = validation_table(d, ECUK[cat])[["Device", "GWh_nat",
+                                                  "ECUK", "Δ"]]
+            specs.append(_fig(s, f"{_slug(cat)}-ecuk", validation_chart, val,
+                              f"Model vs ECUK – {low}", figsize=(12, 7),
+                              style="ggplot"))
+    return specs
+
+
+# ======== HASHING ==================================================
+def _slug(text):
+    return "".join(c if c.isalnum() else "-" for c in text.lower()).strip("-")
+
+_source_cache = {}
+
+def _source_digest(fn):
+    """Hash of the whole module defining fn, so edits to the helpers it
+    calls (plots._bars, top_n_others, styling) also invalidate figures."""
+    module = inspect.getmodule(fn)
+    if module not in _source_cache:
+        _source_cache[module] = hashlib.sha256(
+            inspect.getsource(module).encode()).digest()
+    return _source_cache[module]
+
+def _update(h, obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        if isinstance(obj, pd.Series):
+            h.update(repr((obj.name, obj.dtype)).encode())
+        else:
+            h.update(repr(list(zip(obj.columns, obj.dtypes))).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif callable(obj):
+        h.update(obj.__qualname__.encode() + _source_digest(obj))
+    else:
+        h.update(repr(obj).encode())
+
+def digest(spec):
+    """Content hash of one figure: function, data slice and arguments."""
+    h = hashlib.sha256(spec["name"].encode())
+    _update(h, spec["fn"])
+    for a in spec["args"]:
+        _update(h, a)
+    for k in sorted(spec["kwargs"]):
+        h.update(k.encode())
+        _update(h, spec["kwargs"][k])
+    h.update(repr((spec["figsize"], spec["style"])).encode())
+    return h.hexdigest()[:20]
+
+
+# ======== RENDER ===================================================
+def render(spec, path, dpi=100):
+    """Draw one figure off-screen (no pyplot state) and save it."""
+    with plt.style.context(spec["style"] or "default"):
+        fig = Figure(figsize=spec["figsize"])
+        ax = fig.add_subplot()
+        spec["fn"](*spec["args"], ax=ax, **spec["kwargs"])
+        fig.tight_layout()
+        fig.savefig(path, dpi=dpi)
+
+
+def build_report(specs, out_dir="report", title="Energy Electronics in the UK",
+                 dpi=100):
+    """
+    Render changed figures into out_dir/figures, reuse the rest, and write
+    out_dir/index.html.  Returns {"rendered": [...], "reused": [...]}.
+    """
+    fig_dir = os.path.join(out_dir, "figures")
+    os.makedirs(fig_dir, exist_ok=True)
+    existing = set(os.listdir(fig_dir))
+
+    stats = {"rendered": [], "reused": []}
+    body, section = [], None
+    for spec in specs:
+        fname = f"{spec['name']}-{digest(spec)}.png"
+        if fname in existing:
+            stats["reused"].append(spec["name"])
+        else:
+            render(spec, os.path.join(fig_dir, fname), dpi)
+            stats["rendered"].append(spec["name"])
+            # drop stale versions of this figure
+            for old in existing:
+                if old.rsplit("-", 1)[0] == spec["name"]:
+                    os.remove(os.path.join(fig_dir, old))
+
+        if spec["section"] != section:
+            section = spec["section"]
+            body.append(f"<h2>{html.escape(section)}</h2>")
+        body.append(f'<img src="figures/{fname}" alt="{html.escape(spec["name"])}">')
+
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                f"<title>{html.escape(title)}</title>"
+                "<style>body{font-family:sans-serif;margin:2em}"
+                "img{max-width:100%;margin:0.5em 0;display:block}</style>"
+                f"</head><body><h1>{html.escape(title)}</h1>\n"
+                + "\n".join(body) + "\n</body></html>\n")
+    return stats
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else "report"
+    t0 = time.perf_counter()
+    stats = build_report(figures(compute(load_registry())), out)
+    print(f"Report written to {out}/index.html in {time.perf_counter()-t0:.1f} s "
+          f"({len(stats['rendered'])} rendered, {len(stats['reused'])} reused)")
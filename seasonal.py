@@ -0,0 +1,168 @@
+"""
+Seasonal and day-type usage calendar in place of the flat × 365.
+
+    python seasonal.py --year 2025 [--temperature daily_temps.csv]
+
+Each day of the year scales a device's T_active by three factors:
+
+* a monthly modifier;
+* a weekday / weekend modifier;
+* for refrigeration, a temperature term, 1 + coef · (t - t_ref).
+
+The monthly and day-type modifiers are normalised to average 1 over the
+calendar, so they reshape the year without moving its total.  The
+temperature term does not, so a warm year adds energy.  Daily kWh is one
+(days × devices) product.  It sums to monthly tables and, because the
+model is linear in T_active, collapses to the usual columns through an
+effective annual T_active (see effective()).  That also makes the
+calendar a drop-in for the Monte Carlo engine at any N.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import model
+from model import CARBON, PARAMS
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# illustrative modifiers on T_active (normalised over the year on use)
+_TV      = [1.15, 1.10, 1.00, 0.95, 0.90, 0.85, 0.85, 0.90, 0.95, 1.00, 1.10, 1.15]
+_COOKING = [1.15, 1.10, 1.05, 1.00, 0.90, 0.85, 0.85, 0.85, 0.95, 1.05, 1.10, 1.20]
+_CONSOLE = [1.10, 1.00, 1.00, 1.00, 0.95, 0.90, 1.00, 1.05, 0.95, 1.00, 1.05, 1.20]
+MONTHLY = {
+    "TV (LCD)": _TV, "TV (OLED)": _TV, "Set-Top Box": _TV,
+    "Gaming Console (Home)": _CONSOLE, "Gaming Console (Handheld)": _CONSOLE,
+    "Electric Oven": _COOKING, "Electric Hob": _COOKING,
+}
+# device → (weekday, weekend)
+DAYTYPE = {
+    "TV (LCD)": (0.95, 1.15), "TV (OLED)": (0.95, 1.15),
+    "Set-Top Box": (0.95, 1.15),
+    "Gaming Console (Home)": (0.85, 1.40),
+    "Gaming Console (Handheld)": (0.85, 1.40),
+    "Electric Oven": (0.95, 1.15), "Electric Hob": (0.95, 1.15),
+}
+# device → {"coef": fraction per °C, "ref": °C}; compressor duty cycle
+TEMPERATURE = {"Fridge/Freezer": {"coef": 0.03, "ref": 10.5}}
+
+# UK daily mean temperature climatology (°C), coldest around 20 January
+T_MEAN, T_AMPLITUDE, T_COLDEST_DOY = 10.5, 6.5, 20
+
+
+def calendar(year=2025, temperature=None):
+    """One row per day: date, month (0-11), weekend flag and mean °C."""
+    dates = pd.date_range(f"{year}-01-01", f"{year}-12-31", freq="D")
+    if temperature is None:
+        doy = dates.dayofyear.to_numpy()
+        temperature = T_MEAN - T_AMPLITUDE * np.cos(
+            2 * np.pi * (doy - T_COLDEST_DOY) / 365.25)
+    temperature = np.asarray(temperature, float)
+    if len(temperature) != len(dates):
+        raise ValueError(f"{len(temperature)} temperatures for {len(dates)} days")
+    return pd.DataFrame({"date": dates,
+                         "month": dates.month.to_numpy() - 1,
+                         "weekend": dates.dayofweek.to_numpy() >= 5,
+                         "temperature": temperature})
+
+
+def multipliers(df, cal, monthly=MONTHLY, daytype=DAYTYPE,
+                temperature=TEMPERATURE):
+    """T_active multiplier per day and device, (days, devices)."""
+    devices = list(df["Device"])
+    month = np.array([monthly.get(d, [1.0] * 12) for d in devices], float)
+    day = np.array([daytype.get(d, (1.0, 1.0)) for d in devices], float)
+    M = month.T[cal["month"].to_numpy()] * day.T[cal["weekend"].to_numpy(int)]
+    M /= M.mean(0)
+    coef = np.array([temperature.get(d, {}).get("coef", 0.0) for d in devices])
+    ref = np.array([temperature.get(d, {}).get("ref", 0.0) for d in devices])
+    t = cal["temperature"].to_numpy(float)[:, None]
+    return M * np.maximum(1 + coef * (t - ref), 0)
+
+
+def daily_kwh(df, M):
+    """kWh per unit per day, (days, devices); T_active·M is capped at 1440."""
+    T = np.minimum(df["T_active"].to_numpy(float) * M, 1440)
+    return np.add(*model.energy(df["Pmid"].to_numpy(float), T,
+                                df["P_standby"].to_numpy(float), days=1))
+
+
+def effective(df, cal, M=None):
+    """
+    Copy of df whose T_active is the calendar-weighted daily mean, so
+    model.compute(…, days=len(cal)) and montecarlo.sample_kwh(…, days=len(cal))
+    reproduce the calendar's annual totals exactly.
+    """
+    M = multipliers(df, cal) if M is None else M
+    out = df.copy()
+    out["T_active"] = np.minimum(df["T_active"].to_numpy(float) * M, 1440).mean(0)
+    out["T_standby"] = 1440 - out["T_active"]
+    return out
+
+
+def compute(df, cal, carbon=CARBON, M=None):
+    """The usual model columns for the calendar year (same names as model.compute)."""
+    return model.compute(effective(df, cal, M), carbon, days=len(cal))
+
+
+def monthly(df, cal, carbon=CARBON, M=None):
+    """Long table of kWh_hh, GWh_nat and kt_nat per month and device."""
+    M = multipliers(df, cal) if M is None else M
+    kwh = daily_kwh(df, M)
+    by_month = np.zeros((12, len(df)))
+    np.add.at(by_month, cal["month"].to_numpy(), kwh)
+    gwh = by_month * df["Units_mil"].to_numpy(float)
+    n = len(df)
+    return pd.DataFrame({
+        "Month":    np.repeat(MONTHS, n),
+        "Device":   np.tile(df["Device"].to_numpy(), 12),
+        "Category": np.tile(df["Category"].to_numpy(), 12),
+        "kWh_hh":   by_month.ravel(),
+        "GWh_nat":  gwh.ravel(),
+        "kt_nat":   gwh.ravel() * carbon,
+    })
+
+
+def monthly_mc(df, cal, N=10_000, seed=42, band=0.1, M=None):
+    """
+    National GWh per month for every Monte Carlo draw, (12, N).  Pmid is
+    drawn as in montecarlo.sample_kwh (same seed, same draws); monthly
+    energy is linear in it, so this is a (12, devices) @ (devices, N) product.
+    """
+    M = multipliers(df, cal) if M is None else M
+    Pmid, T, Ps, U = (df[p].to_numpy(float) for p in PARAMS)
+    Tm = np.minimum(T * M, 1440)                           # (days, devices)
+    onehot = np.zeros((12, len(cal)))
+    onehot[cal["month"].to_numpy(), np.arange(len(cal))] = 1
+    per_w, standby = model.energy(1.0, Tm, Ps, days=1)     # (days, devices)
+    slope = onehot @ (per_w * U)                           # GWh per W of Pmid
+    const = onehot @ (standby * U) @ np.ones(len(df))      # stand-by GWh
+    P = np.random.default_rng(seed).triangular(
+        (Pmid * (1 - band))[:, None], Pmid[:, None], (Pmid * (1 + band))[:, None],
+        size=(len(df), N))
+    return slope @ P + const[:, None]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--year", type=int, default=2025)
+    ap.add_argument("--temperature", help="CSV with one daily mean °C per row")
+    a = ap.parse_args()
+
+    temps = (None if a.temperature is None else
+             pd.read_csv(a.temperature).select_dtypes("number").iloc[:, -1])
+    cal = calendar(a.year, temps)
+    reg = model.load_registry()
+    flat = model.compute(reg.copy())
+    df = compute(reg, cal)
+    m = monthly(reg, cal)
+
+    print(f"{a.year}: {len(cal)} days, {cal.weekend.sum()} weekend days")
+    print(f"Annual GWh: {df.GWh_nat.sum():,.1f} "
+          f"(flat × 365: {flat.GWh_nat.sum():,.1f})")
+    print("\nNational GWh by month and category")
+    print(m.pivot_table(index="Month", columns="Category", values="GWh_nat",
+                        aggfunc="sum", sort=False)
+           .to_string(float_format="{:,.0f}".format))
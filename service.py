@@ -0,0 +1,289 @@
+"""
+Local JSON service for scenario evaluation.
+
+    python service.py --port 8765
+
+    GET  /health
+    GET  /totals                      national GWh / kt for the registry
+    GET  /categories                  category splits
+    GET  /sensitivity?top=10          largest ±10 % swings
+    POST /evaluate    {"overrides": {"Kettle": {"Pmid": 2800}}, "carbon": 0.22535}
+    POST /montecarlo  {"overrides": {...}, "N": 10000, "seed": 42}
+
+The registry is loaded once.  Light requests are answered on the event loop,
+Monte Carlo requests run in a process pool.  Identical requests that arrive
+while one is in flight share its result, and recent results sit in a bounded
+LRU cache.
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+import pandas as pd
+
+import model
+import montecarlo
+
+MAX_N = 2_000_000          # cap on Monte Carlo samples per request
+MAX_BODY = 1 << 20         # 1 MiB request bodies
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+# ======== MODEL CALLS ==============================================
+def prepare(base):
+    """The registry's static arrays, extracted once for evaluate()."""
+    codes, cats = pd.factorize(base["Category"], sort=True)
+    return {"values": base[model.PARAMS].to_numpy(float),
+            "rows": {d: i for i, d in enumerate(base["Device"])},
+            "devices": base["Device"].tolist(),
+            "categories": base["Category"].tolist(),
+            "codes": codes, "names": list(cats)}
+
+
+def evaluate(reg, overrides=None, carbon=model.CARBON):
+    """
+    National totals, category splits and device table for one scenario,
+    straight from model.kernel on the prepared registry arrays (no
+    DataFrame rebuild, so light requests stay cheap on the event loop).
+    """
+    values = reg["values"].copy()
+    for dev, params in (overrides or {}).items():
+        if dev not in reg["rows"]:
+            raise KeyError(f"unknown device: {dev!r}")
+        for p, v in params.items():
+            if p not in model.PARAMS:
+                raise KeyError(f"unknown parameter: {p!r}")
+            values[reg["rows"][dev], model.PARAMS.index(p)] = float(v)
+    out = model.kernel(*values.T, carbon=carbon)
+    col = model.KERNEL_COLUMNS.index
+    kwh, gwh, kt = out[col("kWh_hh")], out[col("GWh_nat")], out[col("kt_nat")]
+    n = len(reg["names"])
+    cat_gwh = np.bincount(reg["codes"], gwh, n)
+    cat_kt = np.bincount(reg["codes"], kt, n)
+    return {
+        "GWh_nat": float(gwh.sum()),
+        "kt_nat":  float(kt.sum()),
+        "categories": {c: {"GWh_nat": float(g), "kt_nat": float(k)}
+                       for c, g, k in zip(reg["names"], cat_gwh, cat_kt)},
+        "devices": [{"Device": d, "Category": c, "kWh_hh": h, "GWh_nat": g,
+                     "kt_nat": k}
+                    for d, c, h, g, k in zip(reg["devices"], reg["categories"],
+                                             kwh.tolist(), gwh.tolist(),
+                                             kt.tolist())],
+    }
+
+
+def sensitivity(base, top=10, carbon=model.CARBON):
+    sens = model.sensitivity(model.compute(base.copy(), carbon), carbon)
+    return sens.head(top).to_dict(orient="records")
+
+
+_worker_base = None
+
+def _init_worker(base):
+    global _worker_base
+    _worker_base = base
+
+def _montecarlo_job(overrides, N, seed, carbon):
+    df = model.apply_overrides(_worker_base, overrides)
+    return montecarlo.run(df, N=N, seed=seed, carbon=carbon)
+
+
+# ======== SERVICE ==================================================
+class ModelService:
+    """Request router with in-flight coalescing and an LRU result cache."""
+
+    def __init__(self, registry=None, workers=None, cache_size=256):
+        self.base = model.load_registry(registry)
+        self.reg = prepare(self.base)
+        # spawn, not fork: forked workers would inherit open client sockets
+        self.pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker,
+                                        initargs=(self.base,))
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.inflight = {}
+        self.stats = {"requests": 0, "hits": 0, "coalesced": 0, "computed": 0}
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    async def _cached(self, key, fn, *args, heavy=False):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return self.cache[key]
+        if key in self.inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self.inflight[key])
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self.inflight[key] = fut
+        try:
+            if heavy:
+                result = await loop.run_in_executor(self.pool, fn, *args)
+            else:
+                result = fn(*args)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()             # mark retrieved when nobody is waiting
+            raise
+        finally:
+            del self.inflight[key]
+        fut.set_result(result)
+        self.stats["computed"] += 1
+
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    async def handle(self, method, target, body):
+        """Route one request; returns (status, payload)."""
+        self.stats["requests"] += 1
+        url   = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        path  = url.path.rstrip("/") or "/"
+
+        if path == "/health":
+            return 200, {"status": "ok", **self.stats,
+                         "cached": len(self.cache)}
+
+        if method == "GET":
+            if path == "/totals":
+                r = await self._cached(("evaluate", "{}", model.CARBON),
+                                       evaluate, self.reg)
+                return 200, {"GWh_nat": r["GWh_nat"], "kt_nat": r["kt_nat"]}
+            if path == "/categories":
+                r = await self._cached(("evaluate", "{}", model.CARBON),
+                                       evaluate, self.reg)
+                return 200, r["categories"]
+            if path == "/sensitivity":
+                top = int(query.get("top", 10))
+                if not 0 < top <= len(self.base) * len(model.PARAMS):
+                    raise ValueError(f"top must be in 1.."
+                                     f"{len(self.base) * len(model.PARAMS)}")
+                return 200, await self._cached(("sensitivity", top),
+                                               sensitivity, self.base, top)
+        elif method == "POST":
+            req = json.loads(body or b"{}")
+            if not isinstance(req, dict):
+                raise ValueError("request body must be a JSON object")
+            overrides = req.get("overrides") or {}
+            if not (isinstance(overrides, dict)
+                    and all(isinstance(v, dict) for v in overrides.values())):
+                raise ValueError("overrides must map devices to objects")
+            carbon = float(req.get("carbon", model.CARBON))
+            if not math.isfinite(carbon):
+                raise ValueError("carbon must be finite")
+            okey = json.dumps(overrides, sort_keys=True)
+            if path == "/evaluate":
+                return 200, await self._cached(("evaluate", okey, carbon),
+                                               evaluate, self.reg,
+                                               overrides, carbon)
+            if path == "/montecarlo":
+                N = int(req.get("N", 10_000))
+                seed = int(req.get("seed", 42))
+                if not 0 < N <= MAX_N:
+                    raise ValueError(f"N must be in 1..{MAX_N}")
+                model.apply_overrides(self.base, overrides)   # validate early
+                return 200, await self._cached(
+                    ("montecarlo", okey, N, seed, carbon),
+                    _montecarlo_job, overrides, N, seed, carbon, heavy=True)
+        else:
+            return 405, {"error": f"method {method} not allowed"}
+        return 404, {"error": f"no route for {method} {path}"}
+
+    # ---------- HTTP/1.1 plumbing ----------------------------------
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "body too large"}
+                    keep = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self._respond(method, target, body)
+                    keep = (headers.get("connection", "").lower() != "close"
+                            and version == "HTTP/1.1")
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n"
+                    .encode() + data)
+                await writer.drain()
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target, body):
+        try:
+            return await self.handle(method, target, body)
+        except KeyError as e:
+            return 400, {"error": e.args[0]}
+        except (ValueError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:             # keep the server up
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Start listening; returns the asyncio server (port 0 = any free port)."""
+        return await asyncio.start_server(self._connection, host, port,
+                                          backlog=1024)
+
+
+async def serve(host="127.0.0.1", port=8765, workers=None, cache_size=256):
+    svc = ModelService(workers=workers, cache_size=cache_size)
+    server = await svc.start(host, port)
+    addr = server.sockets[0].getsockname()
+    print(f"Serving model on http://{addr[0]}:{addr[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        svc.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--cache-size", type=int, default=256)
+    a = ap.parse_args()
+    try:
+        asyncio.run(serve(a.host, a.port, a.workers, a.cache_size))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,194 @@
+"""
+Demand shifting of flexible appliances against a half-hourly signal.
+
+    python shifting.py carbon.csv          # one row per day, 48 columns
+
+Each flexible device's active energy in a half-hour slot may be delayed by
+up to `max_delay_h` hours (more than a day is fine), into slots its window
+allows.  Energy already in a disallowed slot moves out whenever an allowed
+slot is in reach.  Shifting has a linear objective and no capacity limit,
+so the optimum moves every slot's energy to the cheapest allowed slot in
+reach.  That slot is a sliding-window
+argmin over the signal, computed at once for every day and device window.
+With a demand ceiling (cap_GW), a greedy pass vectorised over days fills
+the cheapest reachable slots up to the cap instead.  Days are treated as
+circular, so energy can wrap past midnight.
+
+The signal is a carbon intensity (kgCO₂/kWh → avoided kt) or a price
+(£/kWh → avoided £m).  The result also reports the national peak before and
+after shifting.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import model
+import profiles
+
+SLOTS = 48
+# device → {"max_delay_h": hours, "allowed": (from_h, to_h) or None}
+FLEXIBLE = {
+    "Dishwasher":      {"max_delay_h": 12, "allowed": None},
+    "Washing Machine": {"max_delay_h": 12, "allowed": None},
+    "Rice Cooker":     {"max_delay_h": 6,  "allowed": None},
+}
+
+
+def half_hourly(load):
+    """Minute-level national W (devices, 1440) → GWh per half-hour (devices, 48)."""
+    load = np.asarray(load, float)
+    return load.reshape(len(load), SLOTS, -1).sum(2) / 60 / 1e9
+
+
+def active_profiles(df, load):
+    """Split half-hourly GWh into the active (shiftable) and standby parts."""
+    total = half_hourly(load)
+    standby = (df["Units_mil"].to_numpy(float) * df["P_standby"].to_numpy(float)
+               * 1e6 / 1e9 / 2)[:, None] * np.ones(SLOTS)
+    return np.maximum(total - standby, 0), total - np.maximum(total - standby, 0)
+
+
+def _allowed_mask(allowed):
+    if allowed is None:
+        return np.ones(SLOTS, bool)
+    lo, hi = (int(h * 2) % SLOTS for h in allowed)
+    s = np.arange(SLOTS)
+    return (s >= lo) & (s < hi) if lo < hi else (s >= lo) | (s < hi)
+
+
+def targets(signal, max_delay_h, allowed=None):
+    """
+    Best slot for energy starting in each slot: (days, 48) indices into the
+    day, the argmin of `signal` over the next max_delay_h hours (any
+    number) that the window allows.  Energy in a disallowed slot moves even
+    if that costs more; it stays put only if nothing in reach is allowed.
+    """
+    signal = np.atleast_2d(np.asarray(signal, float))
+    W = int(round(max_delay_h * 2))
+    mask = _allowed_mask(allowed)
+    s = np.where(mask, signal, np.inf)
+    ext = np.tile(s, (1, 1 + -(-W // SLOTS)))                 # circular days
+    win = sliding_window_view(ext, W + 1, axis=1)[:, :SLOTS]  # (days, 48, W+1)
+    k = win.argmin(axis=2)
+    t = (np.arange(SLOTS) + k) % SLOTS
+    stuck = ~np.isfinite(np.take_along_axis(s, t, axis=1))
+    return np.where(stuck, np.arange(SLOTS), t)
+
+
+def _place(signal, E, t):
+    """Energy E per source slot moved to targets t → (days, 48) placement."""
+    days = len(signal)
+    cells = (np.arange(days)[:, None] * SLOTS + t).ravel()
+    return np.bincount(cells, weights=np.tile(E, days),
+                       minlength=days * SLOTS).reshape(days, SLOTS)
+
+
+def _place_capped(signal, E, max_delay_h, allowed, headroom):
+    """
+    Greedy placement under a per-slot capacity: each source slot fills its
+    reachable, no-worse slots cheapest first while `headroom` (days, 48,
+    GWh) lasts.  Energy in a disallowed slot fills any allowed slot in reach
+    the same way.  Whatever does not fit stays where it was if that slot is
+    allowed, and otherwise goes where targets() would put it (over the cap),
+    so the window rule is the same as without a cap.  Vectorised over days;
+    `headroom` is updated in place.
+    """
+    days = len(signal)
+    W = int(round(max_delay_h * 2))
+    mask = _allowed_mask(allowed)
+    s = np.where(mask, signal, np.inf)
+    fallback = targets(signal, max_delay_h, allowed)
+    cand = (np.arange(SLOTS)[:, None] + np.arange(W + 1)) % SLOTS   # (48, W+1)
+    order = np.argsort(s[:, cand], axis=2, kind="stable")           # (days, 48, W+1)
+    rows = np.arange(days)
+    placed = np.zeros((days, SLOTS))
+    for i in np.flatnonzero(E):
+        headroom[:, i] += E[i]                      # this energy leaves slot i
+        rem = np.full(days, E[i])
+        ranked = cand[i][order[:, i]]                              # (days, W+1)
+        for r in range(W + 1):
+            tgt = ranked[:, r]
+            st = s[rows, tgt]                         # never move somewhere worse
+            better = np.isfinite(st) & (st <= (signal[:, i] if mask[i] else np.inf))
+            take = np.where(better,
+                            np.clip(np.minimum(rem, headroom[rows, tgt]), 0, None), 0)
+            headroom[rows, tgt] -= take
+            placed[rows, tgt] += take
+            rem -= take
+        stay = np.full(days, i) if mask[i] else fallback[:, i]
+        placed[rows, stay] += rem
+        headroom[rows, stay] -= rem
+    return placed
+
+
+def shift(df, load, signal, flexible=FLEXIBLE, participation=1.0, cap_GW=None):
+    """
+    Optimal shift for every signal day.
+
+    load    : national minute-level W per device (profiles.simulate)
+    signal  : (days, 48) carbon intensity or price
+    cap_GW  : optional ceiling on total demand; shifted energy then fills
+              the cheapest reachable slots greedily up to it
+    Returns per-day avoided totals and peaks, and a per-device table.
+    """
+    signal = np.atleast_2d(np.asarray(signal, float))
+    days = len(signal)
+    active, standby = active_profiles(df, load)
+    base = active.sum(0) + standby.sum(0)                     # GWh per slot
+
+    devices = list(df["Device"])
+    flex = [(devices.index(d), w) for d, w in flexible.items() if d in devices]
+    fixed = base - sum(active[i] * participation for i, _ in flex)
+    headroom = (None if cap_GW is None
+                else np.tile(cap_GW / 2 - base, (days, 1)))
+    shifted = np.tile(fixed, (days, 1))
+    rows, cache = [], {}
+    for i, w in flex:
+        key = (w["max_delay_h"], w.get("allowed"))
+        E = active[i] * participation                         # GWh per slot
+        if headroom is None:
+            if key not in cache:
+                cache[key] = targets(signal, *key)
+            placed = _place(signal, E, cache[key])
+        else:
+            placed = _place_capped(signal, E, *key, headroom)
+        shifted += placed
+        before = signal @ E
+        after = (signal * placed).sum(1)
+        rows.append({"Device": devices[i], "GWh_day": E.sum(),
+                     "avoided_day": (before - after).mean(),
+                     "avoided_%": 100 * (before - after).sum() / before.sum()})
+
+    return {
+        "avoided_day": signal @ base - (signal * shifted).sum(1),
+        "peak_before_GW": np.full(days, base.max() * 2),
+        "peak_after_GW": shifted.max(1) * 2,
+        "profile_after": shifted,
+        "devices": pd.DataFrame(rows),
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("signal", help="CSV, one row per day with 48 half-hourly values")
+    ap.add_argument("--households", type=int, default=200_000)
+    ap.add_argument("--participation", type=float, default=1.0)
+    ap.add_argument("--cap-gw", type=float, default=None)
+    a = ap.parse_args()
+
+    signal = pd.read_csv(a.signal).select_dtypes("number").to_numpy()[:, -SLOTS:]
+    df = model.compute(model.load_registry())
+    load = profiles.simulate(df, a.households)
+    r = shift(df, load, signal, participation=a.participation, cap_GW=a.cap_gw)
+    print(f"{len(signal)} signal days")
+    print(f"Avoided per day: {r['avoided_day'].mean():,.3f} "
+          f"(×365 = {r['avoided_day'].mean() * 365:,.1f} per year)")
+    print(f"Peak: {r['peak_before_GW'].mean():,.2f} GW before, "
+          f"{r['peak_after_GW'].mean():,.2f} GW after (mean over days)")
+    print(r["devices"].to_string(
+        index=False,
+        formatters={"GWh_day": "{:,.2f}".format,
+                    "avoided_day": "{:,.3f}".format,
+                    "avoided_%": "{:.1f}%".format}))
@@ -0,0 +1,222 @@
+"""
+Smart-meter validation.
+
+    python smartmeter.py readings.parquet
+    python smartmeter.py readings.csv --layout wide
+
+Streams half-hourly household readings (CSV or Parquet, any size) in chunks
+and keeps only running sums: per half-hour slot (daily load shape) and per
+household (annual consumption).  Memory grows with the number of households,
+never with the number of readings.
+
+Layouts
+    long   household, timestamp, kWh            (one reading per row)
+    wide   household, day, hh_0 … hh_47         (one household-day per row)
+
+The results are compared with the model's household kWh_hh total and its
+daily load profile in the same Δ format as the ECUK validation.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import model
+
+SLOTS = 48                         # half-hours per day
+READINGS_PER_YEAR = SLOTS * 365
+COLUMNS = {"household": "household", "timestamp": "timestamp", "kwh": "kwh"}
+WIDE = [f"hh_{i}" for i in range(SLOTS)]
+CHUNK_ROWS = 1_000_000
+
+
+# ======== ACCUMULATOR ==============================================
+class MeterStats:
+    """Running sums for the daily load shape and per-household totals."""
+
+    def __init__(self):
+        self.slot_sum = np.zeros(SLOTS)
+        self.slot_sq = np.zeros(SLOTS)
+        self.slot_n = np.zeros(SLOTS, dtype=np.int64)
+        self.ids = {}                              # household → row
+        self.hh_sum = np.zeros(0)
+        self.hh_n = np.zeros(0, dtype=np.int64)
+        self.rows = 0
+        self.invalid = 0
+
+    def _households(self, households):
+        """Global row per reading, growing the per-household arrays as needed."""
+        codes, uniques = pd.factorize(households)
+        if (codes < 0).any():
+            raise ValueError("missing household id")
+        rows = np.fromiter((self.ids.setdefault(h, len(self.ids)) for h in uniques),
+                           dtype=np.int64, count=len(uniques))
+        if len(self.ids) > len(self.hh_sum):
+            grow = max(len(self.ids), 2 * len(self.hh_sum)) - len(self.hh_sum)
+            self.hh_sum = np.concatenate([self.hh_sum, np.zeros(grow)])
+            self.hh_n = np.concatenate([self.hh_n, np.zeros(grow, dtype=np.int64)])
+        return rows[codes]
+
+    def add(self, households, slots, kwh):
+        """Fold in one chunk of readings (slot index 0–47 per reading)."""
+        ok = (np.isfinite(kwh) & (kwh >= 0) & (slots >= 0) & (slots < SLOTS)
+              & pd.notna(households))
+        self.rows += len(kwh)
+        self.invalid += int((~ok).sum())
+        households, slots, kwh = households[ok], slots[ok], kwh[ok]
+
+        self.slot_sum += np.bincount(slots, weights=kwh, minlength=SLOTS)
+        self.slot_sq += np.bincount(slots, weights=kwh * kwh, minlength=SLOTS)
+        self.slot_n += np.bincount(slots, minlength=SLOTS)
+
+        h = self._households(households)
+        n = len(self.hh_sum)
+        self.hh_sum += np.bincount(h, weights=kwh, minlength=n)
+        self.hh_n += np.bincount(h, minlength=n)
+
+    def load_shape(self):
+        """Mean and standard deviation of kWh per half-hour slot."""
+        n = np.maximum(self.slot_n, 1)
+        mean = self.slot_sum / n
+        std = np.sqrt(np.maximum(self.slot_sq / n - mean**2, 0))
+        return pd.DataFrame({"slot": np.arange(SLOTS), "kWh_mean": mean,
+                             "kWh_std": std, "readings": self.slot_n})
+
+    def annual(self, min_coverage=0.5):
+        """
+        Annualised kWh per household, skipping households with less than
+        `min_coverage` of a year of readings.
+        """
+        k = len(self.ids)
+        s, n = self.hh_sum[:k], self.hh_n[:k]
+        keep = n >= min_coverage * READINGS_PER_YEAR
+        return pd.Series(s[keep] / n[keep] * READINGS_PER_YEAR,
+                         index=np.array(list(self.ids), dtype=object)[keep],
+                         name="kWh_yr")
+
+
+# ======== READERS ==================================================
+def _chunks(path, columns, chunk_rows):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        f = pq.ParquetFile(path)
+        for batch in f.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+
+
+def scan(path, layout="long", columns=COLUMNS, chunk_rows=CHUNK_ROWS):
+    """Stream `path` into a MeterStats accumulator."""
+    acc = MeterStats()
+    h = columns["household"]
+    if layout == "long":
+        ts, kwh = columns["timestamp"], columns["kwh"]
+        for d in _chunks(path, [h, ts, kwh], chunk_rows):
+            t = pd.to_datetime(d[ts], errors="coerce")
+            slots = (t.dt.hour * 2 + t.dt.minute // 30).fillna(-1).to_numpy(np.int64)
+            acc.add(d[h].to_numpy(), slots,
+                    pd.to_numeric(d[kwh], errors="coerce").to_numpy(float))
+    else:
+        for d in _chunks(path, [h] + WIDE, chunk_rows):
+            v = d[WIDE].apply(pd.to_numeric, errors="coerce").to_numpy(float)
+            acc.add(np.repeat(d[h].to_numpy(), SLOTS),
+                    np.tile(np.arange(SLOTS), len(d)), v.ravel())
+    return acc
+
+
+# ======== COMPARISON ===============================================
+def _ownership(df, households_mil):
+    """Units per household: one of each device, or stock / households."""
+    if households_mil is None:
+        return np.ones(len(df))
+    return df["Units_mil"].to_numpy(float) / households_mil
+
+
+def model_profile(df, shapes=None, households_mil=None):
+    """
+    Model household kWh per half-hour slot on an average day.
+
+    Standby energy is spread evenly; active energy follows `shapes`
+    ({device: 48 weights}), or is spread evenly when a device has none.
+    """
+    shapes = shapes or {}
+    own = _ownership(df, households_mil)
+    active = np.zeros(SLOTS)
+    for dev, kwh, n in zip(df["Device"], df["kWh_hh_active"], own):
+        w = np.asarray(shapes.get(dev, np.ones(SLOTS)), float)
+        active += n * kwh / 365 * w / w.sum()
+    return active + (own * df["kWh_hh_standby"]).sum() / 365 / SLOTS
+
+
+def annual_table(df, acc, q=(5, 50, 95), households_mil=None,
+                 min_coverage=0.5):
+    """
+    Model household total vs metered household distribution (Δ format).
+
+    By default the model household owns one of every device; with
+    `households_mil` it owns Units_mil / households_mil of each.  Only
+    households with `min_coverage` of a year of readings count; raises
+    ValueError if there are none.
+    """
+    annual = acc.annual(min_coverage)
+    if not len(annual):
+        raise ValueError(f"no household has min_coverage={min_coverage:g} of "
+                         f"a year of readings ({len(acc.ids):,} households)")
+    model_kwh = (_ownership(df, households_mil) * df["kWh_hh"]).sum()
+    rows = [("Mean", annual.mean())] + [(f"P{p}", np.percentile(annual, p))
+                                         for p in q]
+    val = pd.DataFrame(rows, columns=["Metric", "Metered"])
+    val.insert(1, "kWh_hh", model_kwh)
+    val["Δ"] = 100 * (val.kWh_hh - val.Metered) / val.Metered
+    return val
+
+
+def profile_table(df, acc, shapes=None, hourly=True, households_mil=None):
+    """Model vs metered daily load shape per slot (or per hour), Δ format."""
+    val = pd.DataFrame({"slot": np.arange(SLOTS),
+                        "kWh_hh": model_profile(df, shapes, households_mil),
+                        "Metered": acc.load_shape()["kWh_mean"]})
+    if hourly:
+        val = val.groupby(val.slot // 2)[["kWh_hh", "Metered"]].sum()
+        val.index = [f"{h:02d}:00" for h in val.index]
+        val = val.rename_axis("Hour").reset_index()
+    val["Δ"] = 100 * (val.kWh_hh - val.Metered) / val.Metered
+    return val
+
+
+def _print(val, title):
+    print(f"\n{title}")
+    print(val.to_string(
+        index=False,
+        formatters={
+            "kWh_hh": lambda x: f'{x:,.2f}',
+            "Metered": lambda x: f'{x:,.2f}',
+            "Δ": lambda x: f'{x:+.1f}%'
+        }
+    ))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("path")
+    ap.add_argument("--layout", choices=["long", "wide"], default="long")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--households-mil", type=float, default=None,
+                    help="scale device stock to an average household")
+    ap.add_argument("--min-coverage", type=float, default=0.5,
+                    help="share of a year of readings a household needs")
+    a = ap.parse_args()
+
+    acc = scan(a.path, a.layout, chunk_rows=a.chunk_rows)
+    df = model.compute(model.load_registry())
+    print(f"{acc.rows:,} readings, {len(acc.ids):,} households, "
+          f"{acc.invalid:,} invalid")
+    try:
+        _print(annual_table(df, acc, households_mil=a.households_mil,
+                            min_coverage=a.min_coverage),
+               "Household annual consumption (kWh / yr)")
+    except ValueError as e:
+        print(f"\nHousehold annual consumption: {e}")
+    _print(profile_table(df, acc, households_mil=a.households_mil),
+           "Average-day load profile (kWh / hh)")
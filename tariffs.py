@@ -0,0 +1,173 @@
+"""
+Household and national electricity bills under flat, Economy 7 and
+half-hourly time-of-use tariffs.
+
+    python tariffs.py tariffs.json          # or a CSV, one tariff per row
+
+Every tariff becomes a £/kWh rate for each of the 48 half-hour slots, so a
+set of tariffs is a (tariffs, 48) matrix.  Each device's annual kWh is split
+across the slots by its daily load shape (profiles.simulate, or flat).
+Bills for every tariff and device then come from one einsum.  Device
+bills are per unit owned; household_bills() adds them up over the national
+stock per household and adds the standing charge.
+
+A JSON file maps names to tariffs:
+
+    {"Flat":   {"type": "flat", "rate": 0.245, "standing": 0.53},
+     "E7":     {"type": "economy7", "day": 0.29, "night": 0.13,
+                "night_hours": [0, 7]},
+     "Agile":  {"type": "tou", "rates": [0.15, 0.15, ...48 values]}}
+
+A CSV has a `Tariff` column, an optional `standing` column (£/day) and 24
+or 48 rate columns.  That format suits thousands of generated variants.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import model
+from profiles import HOUSEHOLDS_MIL
+
+SLOTS = 48
+TYPES = ("flat", "economy7", "tou")
+
+
+# ======== TARIFFS ===================================================
+def _night(hours):
+    """Half-hour slots inside [from_h, to_h), wrapping past midnight."""
+    lo, hi = hours
+    return (np.arange(SLOTS) / 2 - lo) % 24 < (hi - lo) % 24
+
+
+def rates(t):
+    """One tariff entry → 48 half-hourly £/kWh rates."""
+    kind = t.get("type", "flat")
+    if kind == "flat":
+        return np.full(SLOTS, float(t["rate"]))
+    if kind == "economy7":
+        return np.where(_night(t.get("night_hours", (0, 7))),
+                        float(t["night"]), float(t["day"]))
+    if kind == "tou":
+        r = np.asarray(t["rates"], float)
+        if len(r) not in (24, SLOTS):
+            raise ValueError(f"tou rates need 24 or 48 values, got {len(r)}")
+        return np.repeat(r, SLOTS // len(r))
+    raise ValueError(f"unknown tariff type: {kind!r}")
+
+
+def load_tariffs(path):
+    """
+    Tariffs from a JSON or CSV file → (names, rates (tariffs, 48) £/kWh,
+    standing charges £/day).
+    """
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, encoding="utf-8") as f:
+            return from_dict(json.load(f))
+    t = pd.read_csv(path)
+    standing = (t.pop("standing").to_numpy(float) if "standing" in t
+                else np.zeros(len(t)))
+    names = t.pop("Tariff").astype(str).tolist()
+    R = t.select_dtypes("number").to_numpy(float)
+    if R.shape[1] not in (24, SLOTS):
+        raise ValueError(f"{path}: need 24 or 48 rate columns besides "
+                         f"Tariff and standing, got {R.shape[1]}")
+    return names, np.repeat(R, SLOTS // R.shape[1], axis=1), standing
+
+
+def from_dict(tariffs):
+    names = list(tariffs)
+    R = np.stack([rates(tariffs[n]) for n in names])
+    standing = np.array([float(tariffs[n].get("standing", 0)) for n in names])
+    return names, R, standing
+
+
+# ======== BILLS =====================================================
+def shares(df, load=None):
+    """
+    Fraction of each device's daily energy in each half hour, (devices, 48).
+    `load` is minute-level W per device (profiles.simulate); flat without.
+    """
+    if load is None:
+        return np.full((len(df), SLOTS), 1 / SLOTS)
+    load = np.asarray(load, float)
+    hh = load.reshape(len(load), SLOTS, -1).sum(2)
+    total = hh.sum(1, keepdims=True)
+    return np.divide(hh, total, out=np.full_like(hh, 1 / SLOTS), where=total > 0)
+
+
+def bills(df, R, share):
+    """
+    £ per device-unit per year for every tariff and device, (tariffs, devices):
+    Σ_slot rate · kWh_hh · share, evaluated as one reduction.
+    """
+    return np.einsum("ts,ds,d->td", R, share, df["kWh_hh"].to_numpy(float))
+
+
+def bill_table(df, names, R, share=None):
+    """
+    Long table of £/yr per unit owned and national £m per tariff and device
+    (kWh_hh is per unit owned, so £m = £/unit · Units_mil).
+    """
+    share = shares(df) if share is None else share
+    B = bills(df, R, share)                                # (tariffs, devices)
+    n = len(df)
+    return pd.DataFrame({
+        "Tariff":   np.repeat(names, n),
+        "Device":   np.tile(df["Device"].to_numpy(), len(names)),
+        "Category": np.tile(df["Category"].to_numpy(), len(names)),
+        "£_unit":   B.ravel(),
+        "£m_nat":   (B * df["Units_mil"].to_numpy(float)).ravel(),
+        "p_per_kWh": (100 * B / df["kWh_hh"].to_numpy(float)).ravel(),
+    })
+
+
+def household_bills(table, names, standing, households_mil=HOUSEHOLDS_MIL):
+    """
+    Average £/household/yr per tariff: the national device bills spread
+    over households, plus 365 days of standing charge.
+    """
+    energy = (table.groupby("Tariff", sort=False)["£m_nat"].sum()
+              .reindex(names) / households_mil)
+    out = pd.DataFrame({"£_energy": energy.to_numpy(),
+                        "£_standing": np.asarray(standing, float) * 365},
+                       index=pd.Index(names, name="Tariff"))
+    out["£_total"] = out["£_energy"] + out["£_standing"]
+    return out
+
+
+def category_bills(table):
+    """National £m per category (rows) and tariff (columns)."""
+    return table.pivot_table(index="Category", columns="Tariff",
+                             values="£m_nat", aggfunc="sum", sort=False)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("tariffs", help="JSON or CSV tariff file")
+    ap.add_argument("--households", type=int, default=0,
+                    help="simulate load shapes with profiles.py (0 = flat)")
+    ap.add_argument("--households-mil", type=float, default=HOUSEHOLDS_MIL)
+    a = ap.parse_args()
+
+    df = model.compute(model.load_registry())
+    names, R, standing = load_tariffs(a.tariffs)
+    load = None
+    if a.households:
+        import profiles
+        load = profiles.simulate(df, a.households)
+    t = bill_table(df, names, R, shares(df, load))
+
+    print(f"{len(names)} tariffs × {len(df)} devices")
+    print("\n£ per unit owned per year")
+    print(t.pivot_table(index="Device", columns="Tariff", values="£_unit",
+                        sort=False).to_string(float_format="{:,.2f}".format))
+    print("\nNational £m per year")
+    cats = category_bills(t)
+    cats.loc["Total"] = cats.sum()
+    print(cats.to_string(float_format="{:,.1f}".format))
+    print("\nAverage £ per household per year")
+    print(household_bills(t, names, standing, a.households_mil)
+          .to_string(float_format="{:,.2f}".format))
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model  # noqa: E402
+from catalogue import Catalogue  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def df():
+    return model.compute(model.load_registry())
+
+
+def test_ids_survive_auto_flush(df, tmp_path):
+    path = str(tmp_path / "runs.db")
+    with Catalogue(path, batch=3) as cat, Catalogue(path, batch=2) as other:
+        pos = []
+        for k in range(7):
+            d = model.compute(model.apply_overrides(df, {"Kettle": {"Pmid": 2000 + k}}))
+            pos.append(cat.log(d, name=f"run{k}"))
+            other.log(df, name="other")
+        cat.flush()
+        assert pos == list(range(7)) and len(set(cat.run_ids)) == 7
+        assert cat.categories(cat.run_ids).shape == (7, 4)
+        for k, p in enumerate(pos):
+            assert cat.inputs(cat.run_ids[p]).loc["Kettle", "Pmid"] == 2000 + k
+        other.flush()
+        assert not set(cat.run_ids) & set(other.run_ids)
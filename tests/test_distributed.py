@@ -0,0 +1,74 @@
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import distributed  # noqa: E402
+import model  # noqa: E402
+import montecarlo  # noqa: E402
+
+
+def _flaky_worker(delay=1.0):
+    """A server that accepts, waits `delay` seconds and closes."""
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+
+    def loop():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            time.sleep(delay)
+            conn.close()
+
+    threading.Thread(target=loop, daemon=True).start()
+    return srv, srv.getsockname()
+
+
+@pytest.fixture(scope="module")
+def df():
+    return model.compute(model.load_registry())
+
+
+def test_requeued_shard_runs_on_healthy_worker(df):
+    parts = distributed.shards("mc", df, 2, seed=1, N=2000)
+    srv, flaky = _flaky_worker()
+    try:
+        with distributed.LocalWorkers(1) as healthy:
+            r = distributed.run("mc", parts, [healthy[0], flaky])
+    finally:
+        srv.close()
+    assert r["N"] == 2000
+    assert r["mean"] == distributed.run_local("mc", parts)["mean"]
+
+
+def test_error_reply_keeps_worker(df):
+    parts = distributed.shards("mc", df, 3, seed=1, N=3000)
+    parts[0] = {**parts[0], "n": -1}                  # the task raises
+    with distributed.LocalWorkers(1) as workers:
+        with pytest.raises(RuntimeError, match="1 shards failed: shard 0"):
+            distributed.run("mc", parts, workers, retries=2)
+
+
+def test_merged_percentiles_within_one_bin(df):
+    parts = distributed.shards("mc", df, 4, seed=7, N=40_000)
+    r = distributed.run_local("mc", parts, q=(5, 50, 95))
+    units = df["Units_mil"].to_numpy(float)
+    total = np.concatenate([
+        montecarlo.national(montecarlo.sample_kwh(df, p["n"],
+                                                  distributed._seed(p["seed"]),
+                                                  p["band"]), units)
+        for p in parts])
+    width = np.diff(parts[0]["range"])[0] / montecarlo.BINS
+    assert r["N"] == len(total) == 40_000
+    assert r["mean"] == pytest.approx(total.mean())
+    for p in (5, 50, 95):
+        assert abs(r["GWh_nat"][f"P{p}"] - np.percentile(total, p)) <= width
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import distributions  # noqa: E402
+import model  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def df():
+    return model.load_registry()
+
+
+@pytest.mark.parametrize("entry, expect", [
+    ({"dist": "triangular", "low": 2500, "high": 3300, "relative": False},
+     (2500 + 3000 + 3300) / 3),
+    ({"dist": "triangular", "low": 0.8, "high": 1.1}, (2400 + 3000 + 3300) / 3),
+    ({"dist": "lognormal", "sigma": 0.2, "relative": False},
+     3000 * np.exp(0.02)),
+])
+def test_mode_and_median_default_to_registry_value(df, entry, expect):
+    """Kettle Pmid is 3000 W; an absolute entry's centre is still 3000 W."""
+    spec = {"devices": {"Kettle": {"Pmid": entry}}}
+    i = int(np.flatnonzero(df["Device"] == "Kettle")[0])
+    x = distributions.sample(df, spec, N=200_000, seed=3)["Pmid"][i]
+    mean = distributions.means(df, spec)["Pmid"][i]
+    assert mean == pytest.approx(expect)
+    assert x.mean() == pytest.approx(mean, rel=2e-3)
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model  # noqa: E402
+import montecarlo  # noqa: E402
+
+Q = (95, 99, 99.9)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return model.compute(model.load_registry())
+
+
+@pytest.fixture(scope="module")
+def reference(df):
+    """Plain percentiles from 4M draws and their standard errors."""
+    units = df["Units_mil"].to_numpy(float)
+    tot = np.concatenate([montecarlo.national(montecarlo.sample_kwh(df, 1_000_000,
+                                                                    seed=100 + s), units)
+                          for s in range(4)])
+    ref = np.percentile(tot, Q)
+    # se of a percentile: sqrt(p(1-p)/n) / density at it
+    h = (tot.max() - tot.min()) / 2000
+    dens = [((tot > v - h) & (tot <= v + h)).mean() / (2 * h) for v in ref]
+    se = [np.sqrt(p / 100 * (1 - p / 100) / len(tot)) / f for p, f in zip(Q, dens)]
+    return dict(zip(Q, zip(ref, se)))
+
+
+@pytest.mark.parametrize("method", montecarlo.METHODS)
+def test_tail_matches_plain_reference(df, reference, method):
+    r = montecarlo.tail(df, q=Q, N=20_000, seed=5, method=method)
+    assert r["N"] == 20_000
+    for p in Q:
+        ref, ref_se = reference[p]
+        est, se = r["GWh_nat"][f"P{p}"], r["GWh_nat_se"][f"P{p}"]
+        assert abs(est - ref) < 4 * np.hypot(se, ref_se), (p, est, ref, se)
+
+
+def test_importance_is_sharper_in_the_tail(df):
+    plain = montecarlo.tail(df, N=20_000, method="plain")
+    imp = montecarlo.tail(df, N=20_000, method="importance")
+    assert imp["GWh_nat_se"]["P99.9"] < plain["GWh_nat_se"]["P99.9"] / 3
+
+
+def test_antithetic_needs_even_n(df):
+    with pytest.raises(ValueError, match="even N"):
+        montecarlo.tail(df, N=10_001, method="antithetic")
+
+
+@pytest.mark.parametrize("method", ["antithetic", "control"])
+def test_ess_may_be_infinite(df, method):
+    assert montecarlo.tail(df, N=2_000, method=method)["ESS"] == np.inf
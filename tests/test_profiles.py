@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model  # noqa: E402
+import profiles  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def df():
+    d = model.load_registry()
+    d["Units_mil"] = 2 * profiles.HOUSEHOLDS_MIL      # two units per home
+    return model.compute(d)
+
+
+@pytest.mark.parametrize("sessions", [1, 2, 7])
+def test_daily_energy_matches_model(df, sessions):
+    load = profiles.simulate(df, households=2_000, chunk=700, sigma=0.8,
+                             sessions={d: sessions for d in df["Device"]})
+    kwh_day = load.sum(1) / 60 / 1e3
+    own = profiles.ownership(df)
+    expect = (df["kWh_hh"] / 365 * own * profiles.HOUSEHOLDS_MIL * 1e6).to_numpy()
+    np.testing.assert_allclose(kwh_day, expect, rtol=1e-9)
+
+
+def test_always_on_device_is_flat(df):
+    d = df[df["Device"] == "Wifi Router"]
+    load = profiles.simulate(d, households=1_000, sessions={"Wifi Router": 3})
+    np.testing.assert_allclose(load[0], d["Pmid"].iloc[0] * 2
+                               * profiles.HOUSEHOLDS_MIL * 1e6)
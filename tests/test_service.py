@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model  # noqa: E402
+from service import ModelService  # noqa: E402
+
+
+async def _request(port, method, target, body=None):
+    """One HTTP/1.1 request over a fresh localhost connection."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n"
+                 .encode() + data)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def _serve(scenario):
+    """Run `scenario(port, svc)` against a service on a free localhost port."""
+    async def main():
+        svc = ModelService(workers=1)
+        server = await svc.start(port=0)
+        try:
+            return await scenario(server.sockets[0].getsockname()[1], svc)
+        finally:
+            server.close()
+            await server.wait_closed()
+            svc.close()
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="module")
+def df():
+    return model.compute(model.load_registry())
+
+
+def test_end_to_end(df):
+    async def scenario(port, svc):
+        out = {"totals": await _request(port, "GET", "/totals"),
+               "cats": await _request(port, "GET", "/categories"),
+               "sens": await _request(port, "GET", "/sensitivity?top=3"),
+               "eval": await _request(port, "POST", "/evaluate",
+                                      {"overrides": {"Kettle": {"Pmid": 2800}}}),
+               "mc": await _request(port, "POST", "/montecarlo",
+                                    {"N": 2000, "seed": 1})}
+        out["mc_again"] = await _request(port, "POST", "/montecarlo",
+                                         {"N": 2000, "seed": 1})
+        out["stats"] = dict(svc.stats)
+        return out
+    r = _serve(scenario)
+
+    assert r["totals"][0] == 200
+    assert r["totals"][1]["GWh_nat"] == pytest.approx(df["GWh_nat"].sum())
+    cats = model.category_totals(df)
+    assert r["cats"][1] == {c: pytest.approx({"GWh_nat": row.GWh_nat,
+                                              "kt_nat": row.kt_nat})
+                            for c, row in cats.iterrows()}
+    assert len(r["sens"][1]) == 3
+
+    scen = model.compute(model.apply_overrides(df, {"Kettle": {"Pmid": 2800}}))
+    assert r["eval"][1]["GWh_nat"] == pytest.approx(scen["GWh_nat"].sum())
+
+    assert r["mc"][0] == 200 and r["mc_again"][1] == r["mc"][1]
+    assert r["stats"]["hits"] >= 2            # /categories and the MC repeat
+
+
+def test_concurrent_requests_are_coalesced():
+    async def scenario(port, svc):
+        body = {"overrides": {"Laptop": {"T_active": 300}}}
+        rs = await asyncio.gather(*(_request(port, "POST", "/evaluate", body)
+                                    for _ in range(200)))
+        return rs, dict(svc.stats)
+    rs, stats = _serve(scenario)
+    assert all(status == 200 for status, _ in rs)
+    assert len({json.dumps(p, sort_keys=True) for _, p in rs}) == 1
+    assert stats["computed"] == 1
+
+
+@pytest.mark.parametrize("method, target, body, status", [
+    ("POST", "/evaluate", [1, 2], 400),
+    ("POST", "/evaluate", {"overrides": {"Kettle": 5}}, 400),
+    ("POST", "/evaluate", {"overrides": {"Toaster Oven": {"Pmid": 1}}}, 400),
+    ("POST", "/evaluate", {"carbon": "nan"}, 400),
+    ("POST", "/montecarlo", {"N": 0}, 400),
+    ("GET", "/sensitivity?top=0", None, 400),
+    ("GET", "/nowhere", None, 404),
+    ("DELETE", "/totals", None, 405),
+])
+def test_bad_requests(method, target, body, status):
+    async def scenario(port, svc):
+        return await _request(port, method, target, body)
+    got, payload = _serve(scenario)
+    assert got == status and "error" in payload
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shifting  # noqa: E402
+
+SLOTS = shifting.SLOTS
+
+
+@pytest.fixture(scope="module")
+def signal():
+    return np.random.default_rng(0).random((5, SLOTS))
+
+
+@pytest.mark.parametrize("delay", [0.5, 12, 24, 25, 36, 60])
+def test_targets_any_delay(signal, delay):
+    t = shifting.targets(signal, delay)
+    W = int(round(delay * 2))
+    reach = (np.arange(SLOTS)[:, None] + np.arange(W + 1)) % SLOTS
+    np.testing.assert_array_equal(signal[np.arange(5)[:, None], t],
+                                  signal[:, reach].min(2))
+
+
+@pytest.mark.parametrize("delay, allowed", [(6, None), (6, (22, 6)),
+                                            (36, (1, 3)), (2, (1, 3))])
+def test_capped_without_binding_cap_matches_uncapped(signal, delay, allowed):
+    E = np.linspace(1, 2, SLOTS)
+    free = shifting._place(signal, E, shifting.targets(signal, delay, allowed))
+    capped = shifting._place_capped(signal, E, delay, allowed,
+                                    np.full((5, SLOTS), 1e9))
+    np.testing.assert_allclose(capped, free)
+
+
+def test_capped_moves_energy_out_of_disallowed_slots(signal):
+    E = np.ones(SLOTS)
+    allowed = (22, 6)
+    mask = shifting._allowed_mask(allowed)
+    placed = shifting._place_capped(signal, E, 24, allowed,
+                                    np.zeros((5, SLOTS)))   # no room anywhere
+    assert placed[:, ~mask].sum() == 0
+    np.testing.assert_allclose(placed.sum(1), E.sum())
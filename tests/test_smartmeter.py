@@ -0,0 +1,27 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model  # noqa: E402
+import smartmeter  # noqa: E402
+
+
+def test_annual_table_needs_covered_households(tmp_path):
+    n = 48 * 30                                    # a month per household
+    pd.DataFrame({
+        "household": np.repeat(["a", "b"], n),
+        "timestamp": np.tile(pd.date_range("2024-01-01", periods=n,
+                                           freq="30min"), 2),
+        "kwh": 0.25,
+    }).to_csv(tmp_path / "m.csv", index=False)
+    acc = smartmeter.scan(str(tmp_path / "m.csv"))
+    df = model.compute(model.load_registry())
+    with pytest.raises(ValueError, match="min_coverage=0.5"):
+        smartmeter.annual_table(df, acc)
+    val = smartmeter.annual_table(df, acc, min_coverage=0.05)
+    assert val.Metered.tolist() == pytest.approx([0.25 * 48 * 365] * 4)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model  # noqa: E402
+import tariffs  # noqa: E402
+
+
+@pytest.mark.parametrize("n_rates", [12, 47, 49])
+def test_csv_needs_24_or_48_rates(tmp_path, n_rates):
+    t = pd.DataFrame(np.full((2, n_rates), 0.2), columns=range(n_rates))
+    t.insert(0, "Tariff", ["a", "b"])
+    t.to_csv(tmp_path / "t.csv", index=False)
+    with pytest.raises(ValueError, match="24 or 48 rate columns"):
+        tariffs.load_tariffs(str(tmp_path / "t.csv"))
+
+
+def test_household_bill_includes_standing_charge():
+    df = model.compute(model.load_registry())
+    names, R, standing = tariffs.from_dict(
+        {"Flat": {"type": "flat", "rate": 0.25, "standing": 0.5}})
+    hh = tariffs.household_bills(tariffs.bill_table(df, names, R), names,
+                                 standing, households_mil=20)
+    energy = df["GWh_nat"].sum() * 1e6 * 0.25 / 1e6 / 20     # £m / million homes
+    assert hh.loc["Flat", "£_energy"] == pytest.approx(energy)
+    assert hh.loc["Flat", "£_total"] == pytest.approx(energy + 0.5 * 365)
@@ -0,0 +1,115 @@
+"""
+Uncertainty-aware ECUK validation from Monte Carlo samples.
+
+    python validation.py --N 10000
+
+The deterministic check compares one GWh_nat per device with ECUK and
+colours |Δ| by fixed 10 % / 25 % bands.  This one uses the Monte Carlo
+sample matrix for every benchmarked device in every category.  Per device
+it reports percentile intervals of the national GWh and of Δ, the chance
+that the model exceeds ECUK, and p_bracket = 2·min(F, 1-F), where F is the
+model CDF at ECUK: 1 means ECUK sits at the model median, 0 that it lies
+outside every sample.  The aggregate error (mean |Δ| and Δ on the summed
+total) gets a bootstrap interval that resamples both devices and Monte
+Carlo draws.  Everything is a reduction over the existing samples; the
+model is not rerun.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import model
+from model import ECUK
+
+
+def flat_ecuk(ecuk=ECUK):
+    """{category: {device: GWh}} → {device: GWh}."""
+    return {d: v for devices in ecuk.values() for d, v in devices.items()}
+
+
+def mc_validation(df, mc, units=None, ecuk=ECUK, q=(5, 50, 95),
+                  B=2000, seed=0, ci=95):
+    """
+    Validation table and aggregate-error intervals.
+
+    mc    : household kWh samples (devices, N), e.g. montecarlo.sample_kwh
+    units : Units_mil, (devices,) or per-sample (devices, N); df's by default
+    ecuk  : per-category or flat {device: GWh} benchmarks
+    Returns (table, aggregate).  The table has one row per benchmarked
+    device with model percentiles (GWh), Δ percentiles (%), P_above and
+    p_bracket.  The aggregate holds the mean |Δ| and total Δ with bootstrap
+    intervals over devices and draws.
+    """
+    if ecuk and isinstance(next(iter(ecuk.values())), dict):
+        ecuk = flat_ecuk(ecuk)
+    rows = np.flatnonzero(df["Device"].isin(ecuk).to_numpy())
+    U = df["Units_mil"].to_numpy(float) if units is None else np.asarray(units, float)
+    U = U[rows, None] if U.ndim == 1 else U[rows]
+    G = mc[rows] * U                                       # GWh, (k, N)
+    E = df["Device"].iloc[rows].map(ecuk).to_numpy(float)[:, None]
+    D = 100 * (G - E) / E                                  # Δ %, (k, N)
+
+    F = (G <= E).mean(1)
+    Gq = np.percentile(G, q, axis=1)
+    Dq = np.percentile(D, q, axis=1)
+    table = pd.DataFrame({
+        "Device": df["Device"].iloc[rows].to_numpy(),
+        "Category": (df["Category"].iloc[rows].to_numpy() if "Category" in df
+                     else None),
+        **{f"P{p}": Gq[i] for i, p in enumerate(q)},
+        "ECUK": E[:, 0],
+        **{f"Δ_P{p}": Dq[i] for i, p in enumerate(q)},
+        "P_above": 1 - F,
+        "p_bracket": 2 * np.minimum(F, 1 - F),
+    })
+
+    # bootstrap: resample devices with replacement, one draw per replicate
+    rng = np.random.default_rng(seed)
+    k, N = G.shape
+    idx = rng.integers(0, k, (B, k))
+    col = rng.integers(0, N, B)[:, None]
+    mape = np.abs(D[idx, col]).mean(1)
+    total = 100 * (G[idx, col].sum(1) / E[idx, 0].sum(1) - 1)
+    lo, hi = (100 - ci) / 2, 100 - (100 - ci) / 2
+    aggregate = {
+        "devices": k,
+        "mean_abs_Δ": float(np.abs(D).mean()),
+        "mean_abs_Δ_ci": tuple(map(float, np.percentile(mape, (lo, hi)))),
+        "total_Δ": float(100 * (G.sum(0).mean() / E.sum() - 1)),
+        "total_Δ_ci": tuple(map(float, np.percentile(total, (lo, hi)))),
+        "bracketed": int((table.p_bracket >= (100 - ci) / 100).sum()),
+    }
+    return table, aggregate
+
+
+if __name__ == "__main__":
+    from montecarlo import sample_kwh
+    from plots import validation_interval_chart
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--N", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--band", type=float, default=0.1)
+    ap.add_argument("--no-plot", action="store_true")
+    a = ap.parse_args()
+
+    df = model.compute(model.load_registry())
+    mc = sample_kwh(df, a.N, a.seed, a.band)
+    val, agg = mc_validation(df, mc)
+
+    print(f"ECUK validation, {a.N:,} Monte Carlo draws, "
+          f"{agg['devices']} devices across categories")
+    print(val.to_string(index=False, formatters={
+        "P5": "{:,.0f}".format, "P50": "{:,.0f}".format, "P95": "{:,.0f}".format,
+        "ECUK": "{:,.0f}".format, "Δ_P5": "{:+.1f}%".format,
+        "Δ_P50": "{:+.1f}%".format, "Δ_P95": "{:+.1f}%".format,
+        "P_above": "{:.2f}".format, "p_bracket": "{:.2f}".format}))
+    print(f"\nMean |Δ|: {agg['mean_abs_Δ']:.1f}%  "
+          f"(95% CI {agg['mean_abs_Δ_ci'][0]:.1f}–{agg['mean_abs_Δ_ci'][1]:.1f}%)")
+    print(f"Total Δ:  {agg['total_Δ']:+.1f}%  "
+          f"(95% CI {agg['total_Δ_ci'][0]:+.1f} to {agg['total_Δ_ci'][1]:+.1f}%)")
+    print(f"ECUK inside the model's 95% interval for "
+          f"{agg['bracketed']}/{agg['devices']} devices")
+    if not a.no_plot:
+        validation_interval_chart(val, "Model vs ECUK – all categories (P5–P95)")